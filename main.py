@@ -704,6 +704,13 @@ async def main():
 
 def main_wrapper():
     """Wrapper para la función main que puede ser llamada por hupper"""
+    # uvloop es opcional (no existe en Windows): se instala antes de crear el loop
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -726,6 +733,13 @@ def run_with_reloader():
     ])
 
 if __name__ == "__main__":
+    # uvloop es opcional (no existe en Windows): se instala antes de crear el loop
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     # Verificar si se debe usar el reloader
     if len(sys.argv) > 1 and sys.argv[1] == '--no-reload':
         # Ejecutar sin reloader
@@ -139,4 +139,11 @@ async def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # uvloop es opcional (no existe en Windows): se instala antes de crear el loop
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     asyncio.run(main())
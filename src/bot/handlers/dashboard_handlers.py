@@ -4,24 +4,51 @@ Dashboard Handlers para métricas de rendimiento avanzadas
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from datetime import datetime, timedelta
+from bisect import bisect_left
+from operator import itemgetter
+import asyncio
 import logging
+from .loading import load_with_placeholder
 
 logger = logging.getLogger(__name__)
 
+# Salidas de las pantallas de carga y de error: el dashboard vuelve al menú, el resto al dashboard
+_BACK_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_main")]
+])
+_DASHBOARD_BACK_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔙 Volver al Dashboard", callback_data="dashboard_main")]
+])
+
+# Clave de tiempo de cada trade del historial
+_trade_time = itemgetter('time')
+
+def _trades_since(trade_history, start):
+    """Trades con fecha >= start (el conector entrega el historial ordenado por tiempo)"""
+    return trade_history[bisect_left(trade_history, start, key=_trade_time):]
+
 class DashboardHandlers:
+    __slots__ = ('trading_engine',)
+    
     def __init__(self, trading_engine):
         self.trading_engine = trading_engine
     
     async def show_performance_dashboard(self, query):
         """Mostrar dashboard principal de rendimiento"""
         try:
-            # Obtener datos de rendimiento
-            balance_info = await self.trading_engine.get_balance()
-            positions = await self.trading_engine.get_open_positions()
-            trade_history = await self.trading_engine.get_trade_history()
+            now = datetime.now()
+            
+            # Obtener datos de rendimiento en paralelo mientras se muestra el aviso de carga
+            balance_info, positions, trade_history = await load_with_placeholder(
+                query, "⏳ Cargando dashboard...", asyncio.gather(
+                    self.trading_engine.get_balance(),
+                    self.trading_engine.get_open_positions(),
+                    self.trading_engine.get_trade_history()
+                ), _BACK_MARKUP
+            )
             
             if not balance_info:
-                await query.edit_message_text("❌ No se pudo obtener información de la cuenta")
+                await query.edit_message_text("❌ No se pudo obtener información de la cuenta", reply_markup=_BACK_MARKUP)
                 return
             
             # Calcular métricas básicas
@@ -78,7 +105,7 @@ class DashboardHandlers:
 • Pérdida Promedio: ${avg_loss:.2f}
 • Ratio Riesgo/Beneficio: {ratio_text}
 
-🕐 **Actualizado**: {datetime.now().strftime('%H:%M:%S')}"""
+🕐 **Actualizado**: {now.strftime('%H:%M:%S')}"""
 
             # Crear botones del dashboard (uno debajo del otro)
             keyboard = [
@@ -97,31 +124,33 @@ class DashboardHandlers:
             
         except Exception as e:
             logger.error(f"Error mostrando dashboard: {e}")
-            await query.edit_message_text(f"❌ Error mostrando dashboard: {str(e)}")
+            await query.edit_message_text(f"❌ Error mostrando dashboard: {str(e)}", reply_markup=_BACK_MARKUP)
     
     async def show_daily_performance(self, query):
         """Mostrar rendimiento diario"""
         try:
+            now = datetime.now()
+            
             # Obtener trades del día actual
-            today = datetime.now().date()
-            trade_history = await self.trading_engine.get_trade_history()
+            today = now.date()
+            trade_history, balance_info = await load_with_placeholder(
+                query, "⏳ Cargando rendimiento diario...", asyncio.gather(
+                    self.trading_engine.get_trade_history(),
+                    self.trading_engine.get_balance()
+                ), _DASHBOARD_BACK_MARKUP
+            )
             
-            daily_trades = []
-            if trade_history:
-                for trade in trade_history:
-                    trade_date = trade.get('time')
-                    if isinstance(trade_date, datetime) and trade_date.date() == today:
-                        daily_trades.append(trade)
+            daily_trades = _trades_since(trade_history, datetime.combine(today, datetime.min.time()))
             
             # Calcular métricas diarias
-            daily_pnl = sum(trade.get('profit', 0) for trade in daily_trades)
-            daily_trades_count = len(daily_trades)
-            daily_wins = sum(1 for trade in daily_trades if trade.get('profit', 0) > 0)
+            daily_profits = [trade.get('profit', 0) for trade in daily_trades]
+            daily_pnl = sum(daily_profits)
+            daily_trades_count = len(daily_profits)
+            daily_wins = sum(1 for profit in daily_profits if profit > 0)
             daily_losses = daily_trades_count - daily_wins
             daily_win_rate = (daily_wins / daily_trades_count * 100) if daily_trades_count > 0 else 0
             
             # Obtener balance inicial del día (aproximado)
-            balance_info = await self.trading_engine.get_balance()
             current_balance = balance_info.get('balance', 0) if balance_info else 0
             initial_balance = current_balance - daily_pnl
             
@@ -133,6 +162,8 @@ class DashboardHandlers:
             else:
                 daily_return = 0
             
+            best_trade, worst_trade = (max(daily_profits), min(daily_profits)) if daily_profits else (0, 0)
+            
             daily_text = f"""📈 **RENDIMIENTO DIARIO**
 📅 {today.strftime('%d/%m/%Y')}
 
@@ -149,11 +180,11 @@ class DashboardHandlers:
 • Win Rate Diario: {daily_win_rate:.1f}%
 
 🎯 **ANÁLISIS:**
-• Mejor Trade: ${max([trade.get('profit', 0) for trade in daily_trades], default=0):.2f}
-• Peor Trade: ${min([trade.get('profit', 0) for trade in daily_trades], default=0):.2f}
+• Mejor Trade: ${best_trade:.2f}
+• Peor Trade: ${worst_trade:.2f}
 • Promedio por Trade: ${(daily_pnl/daily_trades_count) if daily_trades_count > 0 else 0:.2f}
 
-🕐 **Actualizado**: {datetime.now().strftime('%H:%M:%S')}"""
+🕐 **Actualizado**: {now.strftime('%H:%M:%S')}"""
 
             keyboard = [
                 [InlineKeyboardButton("🔄 Actualizar", callback_data="dashboard_daily")],
@@ -165,23 +196,22 @@ class DashboardHandlers:
             
         except Exception as e:
             logger.error(f"Error mostrando rendimiento diario: {e}")
-            await query.edit_message_text(f"❌ Error: {str(e)}")
+            await query.edit_message_text(f"❌ Error: {str(e)}", reply_markup=_DASHBOARD_BACK_MARKUP)
     
     async def show_weekly_performance(self, query):
         """Mostrar rendimiento semanal"""
         try:
+            now = datetime.now()
+            
             # Obtener trades de la semana actual
-            today = datetime.now().date()
+            today = now.date()
             week_start = today - timedelta(days=today.weekday())
             
-            trade_history = await self.trading_engine.get_trade_history()
-            weekly_trades = []
-            
-            if trade_history:
-                for trade in trade_history:
-                    trade_date = trade.get('time')
-                    if isinstance(trade_date, datetime) and trade_date.date() >= week_start:
-                        weekly_trades.append(trade)
+            trade_history = await load_with_placeholder(
+                query, "⏳ Cargando rendimiento semanal...", self.trading_engine.get_trade_history(),
+                _DASHBOARD_BACK_MARKUP
+            )
+            weekly_trades = _trades_since(trade_history, datetime.combine(week_start, datetime.min.time()))
             
             # Calcular métricas semanales
             weekly_pnl = sum(trade.get('profit', 0) for trade in weekly_trades)
@@ -221,7 +251,7 @@ class DashboardHandlers:
 • Peor Día: ${min([d['pnl'] for d in daily_breakdown.values()]):+.2f}
 • Promedio Diario: ${weekly_pnl/7:.2f}
 
-🕐 **Actualizado**: {datetime.now().strftime('%H:%M:%S')}"""
+🕐 **Actualizado**: {now.strftime('%H:%M:%S')}"""
 
             keyboard = [
                 [InlineKeyboardButton("🔄 Actualizar", callback_data="dashboard_weekly")],
@@ -233,15 +263,22 @@ class DashboardHandlers:
             
         except Exception as e:
             logger.error(f"Error mostrando rendimiento semanal: {e}")
-            await query.edit_message_text(f"❌ Error: {str(e)}")
+            await query.edit_message_text(f"❌ Error: {str(e)}", reply_markup=_DASHBOARD_BACK_MARKUP)
     
     async def show_strategy_performance(self, query):
         """Mostrar rendimiento por estrategia"""
         try:
-            trade_history = await self.trading_engine.get_trade_history()
+            now = datetime.now()
+            
+            trade_history = await load_with_placeholder(
+                query, "⏳ Cargando rendimiento por estrategia...", self.trading_engine.get_trade_history(),
+                _DASHBOARD_BACK_MARKUP
+            )
             
             if not trade_history:
-                await query.edit_message_text("📊 No hay datos de trades para analizar por estrategia")
+                await query.edit_message_text(
+                    "📊 No hay datos de trades para analizar por estrategia", reply_markup=_DASHBOARD_BACK_MARKUP
+                )
                 return
             
             # Agrupar trades por estrategia
@@ -286,7 +323,7 @@ class DashboardHandlers:
 
 """
             
-            strategy_text += f"🕐 **Actualizado**: {datetime.now().strftime('%H:%M:%S')}"
+            strategy_text += f"🕐 **Actualizado**: {now.strftime('%H:%M:%S')}"
             
             keyboard = [
                 [InlineKeyboardButton("🔄 Actualizar", callback_data="dashboard_strategy")],
@@ -298,15 +335,22 @@ class DashboardHandlers:
             
         except Exception as e:
             logger.error(f"Error mostrando rendimiento por estrategia: {e}")
-            await query.edit_message_text(f"❌ Error: {str(e)}")
+            await query.edit_message_text(f"❌ Error: {str(e)}", reply_markup=_DASHBOARD_BACK_MARKUP)
     
     async def show_pairs_performance(self, query):
         """Mostrar rendimiento por par de divisas"""
         try:
-            trade_history = await self.trading_engine.get_trade_history()
+            now = datetime.now()
+            
+            trade_history = await load_with_placeholder(
+                query, "⏳ Cargando rendimiento por pares...", self.trading_engine.get_trade_history(),
+                _DASHBOARD_BACK_MARKUP
+            )
             
             if not trade_history:
-                await query.edit_message_text("📊 No hay datos de trades para analizar por pares")
+                await query.edit_message_text(
+                    "📊 No hay datos de trades para analizar por pares", reply_markup=_DASHBOARD_BACK_MARKUP
+                )
                 return
             
             # Agrupar trades por par
@@ -343,7 +387,7 @@ class DashboardHandlers:
 
 """
             
-            pairs_text += f"🕐 **Actualizado**: {datetime.now().strftime('%H:%M:%S')}"
+            pairs_text += f"🕐 **Actualizado**: {now.strftime('%H:%M:%S')}"
             
             keyboard = [
                 [InlineKeyboardButton("🔄 Actualizar", callback_data="dashboard_pairs")],
@@ -355,16 +399,24 @@ class DashboardHandlers:
             
         except Exception as e:
             logger.error(f"Error mostrando rendimiento por pares: {e}")
-            await query.edit_message_text(f"❌ Error: {str(e)}")
+            await query.edit_message_text(f"❌ Error: {str(e)}", reply_markup=_DASHBOARD_BACK_MARKUP)
     
     async def show_drawdown_analysis(self, query):
         """Mostrar análisis de drawdown"""
         try:
-            trade_history = await self.trading_engine.get_trade_history()
-            balance_info = await self.trading_engine.get_balance()
+            now = datetime.now()
+            
+            trade_history, balance_info = await load_with_placeholder(
+                query, "⏳ Cargando análisis de drawdown...", asyncio.gather(
+                    self.trading_engine.get_trade_history(),
+                    self.trading_engine.get_balance()
+                ), _DASHBOARD_BACK_MARKUP
+            )
             
             if not trade_history:
-                await query.edit_message_text("📉 No hay datos suficientes para análisis de drawdown")
+                await query.edit_message_text(
+                    "📉 No hay datos suficientes para análisis de drawdown", reply_markup=_DASHBOARD_BACK_MARKUP
+                )
                 return
             
             current_balance = balance_info.get('balance', 0) if balance_info else 0
@@ -379,9 +431,8 @@ class DashboardHandlers:
             drawdown_periods = []
             
             # Simular balance histórico (desde el más reciente hacia atrás)
-            sorted_trades = sorted(trade_history, key=lambda x: x.get('time', datetime.now()), reverse=True)
-            
-            for trade in sorted_trades:
+            # get_history_deals garantiza orden cronológico: basta con recorrerlo al revés
+            for trade in reversed(trade_history):
                 profit = trade.get('profit', 0)
                 running_balance -= profit  # Restar porque vamos hacia atrás
                 
@@ -403,7 +454,7 @@ class DashboardHandlers:
                     drawdown_periods.append({
                         'amount': drawdown,
                         'percentage': drawdown_pct,
-                        'date': trade.get('time', datetime.now())
+                        'date': trade.get('time', now)
                     })
             
             # Calcular drawdown actual
@@ -415,19 +466,15 @@ class DashboardHandlers:
             drawdown_frequency = len([d for d in drawdown_periods if d['amount'] > 100])  # Drawdowns > $100
             
             # Calcular tiempo de recuperación promedio
+            # El período abre en la operación más reciente y cierra en la posición len(drawdown_periods)
+            # del recorrido inverso; el historial es una lista, así que se indexa sin volver a recorrerlo
             recovery_periods = []
-            in_drawdown = False
-            drawdown_start = None
-            
-            for i, trade in enumerate(sorted_trades):
-                if not in_drawdown and drawdown_periods and i < len(drawdown_periods):
-                    in_drawdown = True
-                    drawdown_start = trade.get('time', datetime.now())
-                elif in_drawdown and (i >= len(drawdown_periods) or drawdown_periods[i]['amount'] == 0):
-                    if drawdown_start:
-                        recovery_time = trade.get('time', datetime.now()) - drawdown_start
-                        recovery_periods.append(recovery_time.days)
-                    in_drawdown = False
+            n_periods = len(drawdown_periods)
+            if 0 < n_periods < len(trade_history):
+                drawdown_start = trade_history[-1].get('time', now)
+                if drawdown_start:
+                    recovery_time = trade_history[-1 - n_periods].get('time', now) - drawdown_start
+                    recovery_periods.append(recovery_time.days)
             
             avg_recovery_days = sum(recovery_periods) / len(recovery_periods) if recovery_periods else 0
             
@@ -470,7 +517,7 @@ class DashboardHandlers:
 • Revisar gestión de riesgo si drawdown > 20%
 • Considerar reducir tamaño de posición
 
-🕐 **Actualizado**: {datetime.now().strftime('%H:%M:%S')}"""
+🕐 **Actualizado**: {now.strftime('%H:%M:%S')}"""
 
             keyboard = [
                 [InlineKeyboardButton("🔄 Actualizar Análisis", callback_data="dashboard_drawdown")],
@@ -483,18 +530,28 @@ class DashboardHandlers:
             
         except Exception as e:
             logger.error(f"Error mostrando análisis de drawdown: {e}")
-            await query.edit_message_text(f"❌ Error en análisis de drawdown: {str(e)}")
+            await query.edit_message_text(
+                f"❌ Error en análisis de drawdown: {str(e)}", reply_markup=_DASHBOARD_BACK_MARKUP
+            )
     
     async def show_realtime_metrics(self, query):
         """Mostrar métricas en tiempo real"""
         try:
-            # Obtener datos en tiempo real
-            balance_info = await self.trading_engine.get_balance()
-            positions = await self.trading_engine.get_open_positions()
-            market_analysis = await self.trading_engine.get_market_analysis()
+            now = datetime.now()
+            
+            # Obtener datos en tiempo real en paralelo mientras se muestra el aviso de carga
+            balance_info, positions, market_analysis = await load_with_placeholder(
+                query, "⏳ Cargando métricas en tiempo real...", asyncio.gather(
+                    self.trading_engine.get_balance(),
+                    self.trading_engine.get_open_positions(),
+                    self.trading_engine.get_market_analysis()
+                ), _DASHBOARD_BACK_MARKUP
+            )
             
             if not balance_info:
-                await query.edit_message_text("❌ No se pueden obtener métricas en tiempo real")
+                await query.edit_message_text(
+                    "❌ No se pueden obtener métricas en tiempo real", reply_markup=_DASHBOARD_BACK_MARKUP
+                )
                 return
             
             # Métricas financieras en tiempo real
@@ -541,7 +598,7 @@ class DashboardHandlers:
             risk_percentage = (margin / equity * 100) if equity > 0 else 0
             
             # Estado del mercado
-            market_status = "🟢 ACTIVO" if datetime.now().weekday() < 5 else "🔴 CERRADO"
+            market_status = "🟢 ACTIVO" if now.weekday() < 5 else "🔴 CERRADO"
             
             # Análisis de volatilidad actual
             volatility = "BAJA"
@@ -593,10 +650,10 @@ class DashboardHandlers:
 🌍 **ESTADO DEL MERCADO:**
 • Estado: {market_status}
 • Volatilidad: {volatility}
-• Sesión: {'Europea' if 7 <= datetime.now().hour <= 16 else 'Americana' if 13 <= datetime.now().hour <= 22 else 'Asiática'}
+• Sesión: {'Europea' if 7 <= now.hour <= 16 else 'Americana' if 13 <= now.hour <= 22 else 'Asiática'}
 
-🕐 **Actualizado**: {datetime.now().strftime('%H:%M:%S')}
-📡 **Próxima actualización**: {(datetime.now() + timedelta(seconds=30)).strftime('%H:%M:%S')}"""
+🕐 **Actualizado**: {now.strftime('%H:%M:%S')}
+📡 **Próxima actualización**: {(now + timedelta(seconds=30)).strftime('%H:%M:%S')}"""
 
             keyboard = [
                 [InlineKeyboardButton("🔄 Actualizar Métricas", callback_data="dashboard_realtime")],
@@ -610,4 +667,6 @@ class DashboardHandlers:
             
         except Exception as e:
             logger.error(f"Error mostrando métricas en tiempo real: {e}")
-            await query.edit_message_text(f"❌ Error en métricas en tiempo real: {str(e)}")
+            await query.edit_message_text(
+                f"❌ Error en métricas en tiempo real: {str(e)}", reply_markup=_DASHBOARD_BACK_MARKUP
+            )
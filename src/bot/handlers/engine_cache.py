@@ -0,0 +1,28 @@
+"""
+Consultas al motor de trading con caché TTL compartida por todos los handlers
+Cada dato tiene un único wrapper (y un único TTL) aunque lo muestren varios menús
+"""
+
+from ...utils.async_cache import async_ttl_cache
+
+# Cachés cortas para absorber pulsaciones repetidas (se invalidan al operar o cerrar trades)
+@async_ttl_cache(2.0, tag='status')
+async def cached_get_status(trading_engine):
+    return await trading_engine.get_status()
+
+@async_ttl_cache(2.0, tag='balance')
+async def cached_get_balance(trading_engine):
+    return await trading_engine.get_balance()
+
+@async_ttl_cache(2.0, tag='positions')
+async def cached_get_positions(trading_engine):
+    return await trading_engine.get_open_positions()
+
+@async_ttl_cache(30.0, tag='history')
+async def cached_get_history(trading_engine):
+    return await trading_engine.get_trade_history()
+
+# El análisis se recalcula como mucho cada pocos segundos aunque se pulse "Actualizar" seguido
+@async_ttl_cache(3.0, tag='analysis')
+async def cached_get_analysis(trading_engine):
+    return await trading_engine.get_market_analysis()
@@ -0,0 +1,23 @@
+"""
+Avisos de carga compartidos por los handlers
+"""
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+import asyncio
+
+_BACK_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
+])
+
+async def load_with_placeholder(query, placeholder: str, coro, reply_markup=_BACK_MARKUP):
+    """Mostrar un aviso de carga mientras se espera la consulta; un fallo del aviso no la afecta"""
+    task = asyncio.ensure_future(coro)
+    try:
+        # Con botón de volver para que la pantalla nunca quede sin salida
+        await query.edit_message_text(placeholder, reply_markup=reply_markup)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    except Exception:
+        pass  # El aviso es cosmético: lo importante son los datos
+    return await task
@@ -4,10 +4,95 @@ Handlers para menús y navegación del bot
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from datetime import datetime
+import random
+import time
+
+# Segundos durante los que se reutiliza el menú principal ya renderizado
+_MENU_CACHE_TTL = 1.0
+
+_TRADING_ANIMATIONS = (
+    "🔍 *Analizando EUR/USD, GBP/USD, USD/JPY...* ⚡",
+    "📊 *Evaluando señales de trading...* 🎯",
+    "💰 *Buscando oportunidades rentables...* 🚀",
+    "⚡ *Procesando datos de mercado...* 📈",
+    "🎯 *Calculando probabilidades de éxito...* 🧠",
+    "🔥 *Escaneando 5 pares simultáneamente...* 💎",
+    "🚀 *Detectando patrones de precio...* 📊",
+    "💎 *Analizando volatilidad del mercado...* ⚡",
+    "🧠 *Aplicando estrategias avanzadas...* 🎯",
+    "📈 *Monitoreando momentum del mercado...* 🔍"
+)
+
+_WELCOME_TEXT = """🚀 *¡Bienvenido a Ultimate Money Machine!*
+
+🤖 *Tu Bot de Trading Automático Avanzado*
+
+✅ *Sistema Inicializado Correctamente*
+🔗 *Conectado a MetaTrader 5*
+💰 *Listo para Generar Ganancias*
+
+🎯 *Capacidades del Bot:*
+• Trading automático en 5 pares principales
+• Análisis inteligente multi-timeframe
+• Estrategias probadas y rentables
+• Gestión de riesgo avanzada
+• Control total desde Telegram
+
+💡 *Para comenzar a generar dinero:*
+Presiona "🚀 Iniciar Trading Auto"
+
+🎮 *Control Total:*
+Puedes iniciar, detener y monitorear el trading desde aquí
+
+Selecciona una opción del menú:"""
+
+_MAIN_TEXT_ACTIVE_TMPL = """🤖 *Ultimate Money Machine - TRABAJANDO*
+
+🟢 *Estado:* Operativo y Generando Dinero
+💱 *Mercados:* EUR/USD, GBP/USD, USD/JPY, AUD/USD, USD/CAD
+🤖 *Trading Automático:* 🟢 Activo
+
+{activity_message}
+
+⚡ *Configuración Activa:*
+• Análisis cada 15 segundos
+• Confianza mínima: 75%
+• Máximo 5 posiciones simultáneas
+• Riesgo: 2-5% por trade
+
+🎮 *Control desde aquí o deja que trabaje solo:*"""
+
+_MAIN_TEXT_INACTIVE = """🤖 *Ultimate Money Machine - LISTA*
+
+📊 *Estado del Sistema:* Conectado y Listo
+💱 *Mercados Disponibles:* 5 pares principales
+🎯 *Objetivo:* Generar ganancias consistentes
+🤖 *Trading Automático:* 🔴 Inactivo
+
+💡 *¿Listo para generar dinero?*
+Presiona "🚀 Iniciar Trading Auto" para comenzar
+
+⚙️ *Configuración Optimizada:*
+• Análisis inteligente multi-timeframe
+• Estrategias probadas y rentables
+• Gestión de riesgo avanzada
+• Control total desde Telegram
+
+Selecciona una opción del menú:"""
 
 class MenuHandlers:
+    __slots__ = ("trading_engine", "ultimate_machine", "_markup_active", "_markup_inactive", "_menu_cache")
+    
     def __init__(self, trading_engine):
         self.trading_engine = trading_engine
+        self.ultimate_machine = None  # Asignado desde main.py
+        
+        # Los dos layouts del menú principal son estáticos: construirlos una sola vez
+        self._markup_active = InlineKeyboardMarkup(self.get_main_keyboard(True))
+        self._markup_inactive = InlineKeyboardMarkup(self.get_main_keyboard(False))
+        
+        # (instante, trading_active, texto, teclado) del último menú renderizado
+        self._menu_cache = None
     
     def get_main_keyboard(self, trading_active=False):
         """Obtener teclado del menú principal organizado"""
@@ -55,85 +140,39 @@ class MenuHandlers:
     
     def get_trading_animation(self):
         """Obtener mensaje de animación aleatoria para trading activo"""
-        import random
-        
-        animations = [
-            "🔍 *Analizando EUR/USD, GBP/USD, USD/JPY...* ⚡",
-            "📊 *Evaluando señales de trading...* 🎯",
-            "💰 *Buscando oportunidades rentables...* 🚀",
-            "⚡ *Procesando datos de mercado...* 📈",
-            "🎯 *Calculando probabilidades de éxito...* 🧠",
-            "🔥 *Escaneando 5 pares simultáneamente...* 💎",
-            "🚀 *Detectando patrones de precio...* 📊",
-            "💎 *Analizando volatilidad del mercado...* ⚡",
-            "🧠 *Aplicando estrategias avanzadas...* 🎯",
-            "📈 *Monitoreando momentum del mercado...* 🔍"
-        ]
-        
-        return random.choice(animations)
+        return _TRADING_ANIMATIONS[random.randrange(len(_TRADING_ANIMATIONS))]
     
     async def show_main_menu(self, query):
         """Mostrar menú principal inteligente y dinámico"""
         # Verificar si el trading automático está activo
         trading_active = False
-        trading_status = "🔴 Inactivo"
-        activity_message = ""
         
         try:
             # Usar la referencia directa al ultimate_machine
-            if hasattr(self, 'ultimate_machine') and self.ultimate_machine:
-                if self.ultimate_machine.running:
-                    trading_active = True
-                    trading_status = "🟢 Activo"
-                    # Obtener animación aleatoria
-                    animation = self.get_trading_animation()
-                    activity_message = f"\n{animation}\n💡 *El bot está trabajando en segundo plano*"
+            if self.ultimate_machine and self.ultimate_machine.running:
+                trading_active = True
         except:
             pass
         
-        # Crear teclado dinámico según el estado
-        keyboard = self.get_main_keyboard(trading_active)
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        # Mensaje dinámico según el estado
-        if trading_active:
-            main_text = f"""
-🤖 *Ultimate Money Machine - TRABAJANDO*
-
-🟢 *Estado:* Operativo y Generando Dinero
-💱 *Mercados:* EUR/USD, GBP/USD, USD/JPY, AUD/USD, USD/CAD
-🤖 *Trading Automático:* {trading_status}
-
-{activity_message}
-
-⚡ *Configuración Activa:*
-• Análisis cada 15 segundos
-• Confianza mínima: 75%
-• Máximo 5 posiciones simultáneas
-• Riesgo: 2-5% por trade
-
-🎮 *Control desde aquí o deja que trabaje solo:*
-            """
+        # Las pulsaciones en ráfaga comparten el mismo render mientras el estado no cambie
+        now = time.monotonic()
+        cache = self._menu_cache
+        if cache is not None and cache[1] == trading_active and now - cache[0] < _MENU_CACHE_TTL:
+            main_text, reply_markup = cache[2], cache[3]
         else:
-            main_text = f"""
-🤖 *Ultimate Money Machine - LISTA*
-
-📊 *Estado del Sistema:* Conectado y Listo
-💱 *Mercados Disponibles:* 5 pares principales
-🎯 *Objetivo:* Generar ganancias consistentes
-🤖 *Trading Automático:* {trading_status}
-
-💡 *¿Listo para generar dinero?*
-Presiona "🚀 Iniciar Trading Auto" para comenzar
-
-⚙️ *Configuración Optimizada:*
-• Análisis inteligente multi-timeframe
-• Estrategias probadas y rentables
-• Gestión de riesgo avanzada
-• Control total desde Telegram
-
-Selecciona una opción del menú:
-            """
+            # Teclado precalculado según el estado
+            reply_markup = self._markup_active if trading_active else self._markup_inactive
+            
+            # Mensaje dinámico según el estado
+            if trading_active:
+                # Obtener animación aleatoria
+                animation = self.get_trading_animation()
+                activity_message = f"\n{animation}\n💡 *El bot está trabajando en segundo plano*"
+                main_text = _MAIN_TEXT_ACTIVE_TMPL.format(activity_message=activity_message)
+            else:
+                main_text = _MAIN_TEXT_INACTIVE
+            
+            self._menu_cache = (now, trading_active, main_text, reply_markup)
         
         await query.edit_message_text(
             main_text,
@@ -144,36 +183,10 @@ Selecciona una opción del menú:
     async def show_welcome_message(self, update):
         """Mostrar mensaje de bienvenida inteligente"""
         # Por defecto, el trading no está activo al iniciar
-        keyboard = self.get_main_keyboard(trading_active=False)
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        welcome_text = """
-🚀 *¡Bienvenido a Ultimate Money Machine!*
-
-🤖 *Tu Bot de Trading Automático Avanzado*
-
-✅ *Sistema Inicializado Correctamente*
-🔗 *Conectado a MetaTrader 5*
-💰 *Listo para Generar Ganancias*
-
-🎯 *Capacidades del Bot:*
-• Trading automático en 5 pares principales
-• Análisis inteligente multi-timeframe
-• Estrategias probadas y rentables
-• Gestión de riesgo avanzada
-• Control total desde Telegram
-
-💡 *Para comenzar a generar dinero:*
-Presiona "🚀 Iniciar Trading Auto"
-
-🎮 *Control Total:*
-Puedes iniciar, detener y monitorear el trading desde aquí
-
-Selecciona una opción del menú:
-        """
+        reply_markup = self._markup_inactive
         
         await update.message.reply_text(
-            welcome_text, 
+            _WELCOME_TEXT, 
             reply_markup=reply_markup,
             parse_mode='Markdown'
         )
@@ -4,16 +4,147 @@ Handlers para monitoreo y testing
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from datetime import datetime
+import asyncio
+import html
+import logging
+from .engine_cache import cached_get_balance, cached_get_history
+from ...utils.edit_cache import EditCache
+
+logger = logging.getLogger(__name__)
+
+# Teclados estáticos (inmutables) compartidos por todos los callbacks
+_BACK_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
+])
+_PERF_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔄 Actualizar", callback_data="performance")],
+    [InlineKeyboardButton("📊 Historial Detallado", callback_data="history")],
+    [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
+])
+_TEST_RETRY_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔄 Ejecutar de Nuevo", callback_data="test_connections")],
+    [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
+])
+_ML_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔄 Actualizar", callback_data="ml_stats")],
+    [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
+])
+_ML_RETRY_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔄 Reintentar", callback_data="ml_stats")],
+    [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
+])
+
+_HELP_TEXT = """ℹ️ *Ayuda - Forex Trading Bot*
+
+🤖 *¿Qué hace este bot?*
+Este bot opera automáticamente en el par EUR/USD usando análisis técnico avanzado y gestión de riesgo.
+
+📊 *Funciones Principales:*
+• Análisis técnico en tiempo real
+• Trading automatizado 24/5
+• Gestión de riesgo integrada
+• Notificaciones instantáneas
+• Control total desde Telegram
+
+⚙️ *Configuración Recomendada:*
+• Cuenta demo para pruebas
+• Riesgo máximo 2% por trade
+• Stop Loss siempre activo
+• Monitoreo regular del rendimiento
+
+🆘 *Controles de Emergencia:*
+• "Pausar Trading" - Detiene nuevas operaciones
+• "Cerrar Todo" - Cierra todas las posiciones
+• El bot respeta siempre los límites de riesgo
+
+⚠️ *Importante:*
+- Siempre usa cuenta demo primero
+- Nunca inviertas más de lo que puedes perder
+- El trading conlleva riesgos"""
+
+_HISTORY_EMPTY_TEXT = """📋 Historial de Trades
+
+📭 No hay trades en el historial aún.
+
+Una vez que el bot comience a operar, verás aquí el historial completo de operaciones."""
+
+_ML_READY_TMPL = """🧠 <b>Machine Learning - Sistema Listo</b>
+
+✅ <b>Estado</b>: Configuración completada
+■■■■■■■■■■■■■■■■■■■■
+
+📋 <b>Sistema ML</b>: Listo para activación
+
+⏰ <b>Actualizado</b>: {timestamp}
+🎯 <b>Estado</b>: Esperando primer trade
+
+💡 <b>Información</b>:
+• Sistema ML completamente configurado
+• Algoritmos de aprendizaje listos
+• Se activará automáticamente con el primer trade
+• Comenzará optimización continua
+
+🚀 <b>Para activar</b>:
+1. Inicia el trading (▶️ Iniciar Trading)
+2. Espera el primer trade
+3. El ML se activará automáticamente
+4. Comenzará el aprendizaje continuo
+
+⚡ <b>Nota</b>: El sistema está listo y esperando datos"""
+
+def _first(trade, keys, default):
+    """Devolver el primer valor presente (no None) entre varias claves alternativas"""
+    for key in keys:
+        value = trade.get(key)
+        if value is not None:
+            return value
+    return default
+
+def _esc(value) -> str:
+    """Escapar un valor para parse_mode='HTML'"""
+    return html.escape(str(value))
+
+def _fmt_rich(row):
+    """Formatear una fila de historial con emojis (HTML con valores escapados)"""
+    trade_id, symbol, trade_type, volume, profit, close_time = row
+    profit_emoji = "✅" if profit > 0 else "❌" if profit < 0 else "⚪"
+    type_emoji = "📈" if trade_type == "BUY" else "📉" if trade_type == "SELL" else "📊"
+    return (f"\n{profit_emoji} Trade #{_esc(trade_id)}\n{type_emoji} {_esc(symbol)} - {_esc(trade_type)}\n"
+            f"📊 Volumen: {_esc(volume)}\n💰 P&amp;L: {profit:.2f} USD\n🕒 {_esc(close_time)}\n\n"
+            "━━━━━━━━━━━━━━━━━━━━━━\n\n")
+
+async def _safe_call(coro, default):
+    """Esperar una corrutina devolviendo un valor por defecto si falla"""
+    try:
+        result = await coro
+        return result if result is not None else default
+    except Exception:
+        return default
 
 class MonitoringHandlers:
+    __slots__ = ("trading_engine", "_ml_stats_fn", "_edits")
+    
+    # Máximo de mensajes recordados para detectar ediciones sin cambios
+    _LAST_RENDERED_MAX = 10000
+    
     def __init__(self, trading_engine):
         self.trading_engine = trading_engine
+        self._edits = EditCache(self._LAST_RENDERED_MAX)
+        # El analizador no se reemplaza en caliente: resolver get_ml_stats una sola vez
+        self._ml_stats_fn = getattr(getattr(trading_engine, 'analyzer', None), 'get_ml_stats', None)
+    
+    async def _edit_if_changed(self, query, text, reply_markup=None, **kwargs) -> bool:
+        """Editar el mensaje solo si el contenido cambió (evita 'Message is not modified')"""
+        return await self._edits.edit(query, text, reply_markup, **kwargs)
     
     async def show_performance_monitor(self, query):
         """Mostrar monitor de rendimiento"""
         try:
-            # Obtener datos de rendimiento
-            account_info = await self.trading_engine.get_balance()
+            # Obtener balance y posiciones en paralelo (un fallo no tumba el panel)
+            account_info, open_positions = await asyncio.gather(
+                _safe_call(cached_get_balance(self.trading_engine), {}),
+                _safe_call(self.trading_engine.get_open_positions(), [])
+            )
             
             # Calcular rendimiento diario (simplificado)
             today_profit = 0  # Se calculará con datos reales del MT5
@@ -29,7 +160,7 @@ class MonitoringHandlers:
 
 📈 **Rendimiento Hoy:**
 • Profit/Loss: ${today_profit:,.2f}
-• Posiciones Abiertas: {len(await self.trading_engine.get_open_positions())}
+• Posiciones Abiertas: {len(open_positions)}
 
 🎯 **Métricas:**
 • Win Rate: Calculando...
@@ -39,35 +170,26 @@ class MonitoringHandlers:
 ⏱️ *Actualizado: {datetime.now().strftime('%H:%M:%S')}*
             """
             
-            keyboard = [
-                [InlineKeyboardButton("🔄 Actualizar", callback_data="performance")],
-                [InlineKeyboardButton("📊 Historial Detallado", callback_data="history")],
-                [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await query.edit_message_text(
+            await self._edit_if_changed(
+                query,
                 performance_text,
-                reply_markup=reply_markup,
+                reply_markup=_PERF_MARKUP,
                 parse_mode='Markdown'
             )
             
         except Exception as e:
             error_text = f"""
-❌ *Error en Monitor de Rendimiento*
+❌ <b>Error en Monitor de Rendimiento</b>
 
 No se pudieron obtener los datos de rendimiento.
 
-Error: {str(e)}
+Error: {_esc(e)}
             """
             
-            keyboard = [[InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
             await query.edit_message_text(
                 error_text,
-                reply_markup=reply_markup,
-                parse_mode='Markdown'
+                reply_markup=_BACK_MARKUP,
+                parse_mode='HTML'
             )
     
     async def run_connection_tests(self, query):
@@ -93,22 +215,19 @@ Error: {str(e)}
             'analysis': False
         }
         
-        # Test MT5
-        try:
-            if hasattr(self.trading_engine, 'mt5'):
-                mt5_connected = self.trading_engine.mt5.is_connected()
-                if mt5_connected:
-                    account_info = await self.trading_engine.mt5.get_account_info()
-                    results['mt5'] = bool(account_info)
-        except:
+        # Si MT5 está desconectado el análisis también fallará: no esperar a probarlo
+        if self._mt5_known_disconnected():
             results['mt5'] = False
-        
-        # Test análisis
-        try:
-            analysis = await self.trading_engine.get_market_analysis()
-            results['analysis'] = bool(analysis)
-        except:
             results['analysis'] = False
+        else:
+            # Test MT5 y análisis en paralelo (son independientes)
+            mt5_result, analysis_result = await asyncio.gather(
+                self._test_mt5(),
+                self._test_analysis(),
+                return_exceptions=True
+            )
+            results['mt5'] = mt5_result is True
+            results['analysis'] = analysis_result is True
         
         # Mostrar resultados
         mt5_status = "✅ PASS" if results['mt5'] else "❌ FAIL"
@@ -132,144 +251,83 @@ Error: {str(e)}
 {'🚀 El bot está listo para operar' if all_passed else '⚠️ Revisa las conexiones fallidas'}
         """
         
-        keyboard = [
-            [InlineKeyboardButton("🔄 Ejecutar de Nuevo", callback_data="test_connections")],
-            [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         await query.edit_message_text(
             results_text,
-            reply_markup=reply_markup,
+            reply_markup=_TEST_RETRY_MARKUP,
             parse_mode='Markdown'
         )
     
-    async def show_history(self, query):
-        """Mostrar historial de trades"""
-        import logging
-        logger = logging.getLogger(__name__)
+    def _mt5_known_disconnected(self) -> bool:
+        """Comprobación síncrona y barata del estado de MT5"""
+        try:
+            mt5 = getattr(self.trading_engine, 'mt5', None)
+            return mt5 is not None and not mt5.is_connected()
+        except Exception:
+            return True
+    
+    async def _test_mt5(self) -> bool:
+        """Probar conexión con MT5"""
+        if not hasattr(self.trading_engine, 'mt5'):
+            return False
+        if not self.trading_engine.mt5.is_connected():
+            return False
+        account_info = await self.trading_engine.mt5.get_account_info()
+        return bool(account_info)
+    
+    async def _test_analysis(self) -> bool:
+        """Probar análisis de mercado (sin caché: debe reflejar el estado actual del feed)"""
+        analysis = await self.trading_engine.get_market_analysis()
+        return bool(analysis)
+    
+    @staticmethod
+    def _normalize_trade(trade, idx):
+        """Extraer (trade_id, symbol, trade_type, volume, profit, close_time) de un trade"""
+        # Manejo robusto de datos del trade
+        trade_id = _first(trade, ('id', 'order_id', 'ticket', 'deal'), idx + 1)
+        symbol = trade.get('symbol', 'EUR/USD')
+        # Si symbol está vacío, usar EUR/USD por defecto
+        if not symbol or symbol.strip() == '':
+            symbol = 'EUR/USD'
+        
+        trade_type = _first(trade, ('type', 'signal'), 'UNKNOWN')
+        volume = _first(trade, ('volume', 'lot_size'), 0)
+        profit = trade.get('profit', 0)
         
-        logger.info("🔍 [DEBUG] show_history called")
+        # Manejo robusto de fecha/hora
+        close_time = _first(trade, ('close_time', 'timestamp', 'time'), 'N/A')
         
+        # Si close_time es un objeto datetime, convertirlo a string
+        if hasattr(close_time, 'strftime'):
+            close_time = close_time.strftime('%Y-%m-%d %H:%M:%S')
+        elif close_time == 'N/A':
+            close_time = 'Fecha no disponible'
+        
+        return trade_id, symbol, trade_type, volume, profit, close_time
+    
+    async def show_history(self, query):
+        """Mostrar historial de trades"""
         try:
-            logger.info("🔍 [DEBUG] Calling get_trade_history...")
-            history = await self.trading_engine.get_trade_history()
-            logger.info(f"🔍 [DEBUG] get_trade_history returned {len(history) if history else 0} trades")
+            history = await cached_get_history(self.trading_engine)
             
-            if not history:
-                history_text = """
-📋 Historial de Trades
-
-📭 No hay trades en el historial aún.
-
-Una vez que el bot comience a operar, verás aquí el historial completo de operaciones.
-                """
+            # Normalizar cada trade una sola vez
+            rows = [self._normalize_trade(trade, i) for i, trade in enumerate(history[:10] if history else [])]
+            logger.debug("history rendered n=%d", len(rows))
+            
+            if not rows:
+                history_text = _HISTORY_EMPTY_TEXT
             else:
-                history_text = "📋 Historial de Trades (Últimos 10)\n\n"
-                
-                for i, trade in enumerate(history[:10]):
-                    logger.info(f"🔍 [DEBUG] Processing trade {i}: {trade}")
-                    
-                    # Manejo robusto de datos del trade
-                    trade_id = trade.get('id', trade.get('order_id', trade.get('ticket', trade.get('deal', i+1))))
-                    symbol = trade.get('symbol', 'EUR/USD')
-                    # Si symbol está vacío, usar EUR/USD por defecto
-                    if not symbol or symbol.strip() == '':
-                        symbol = 'EUR/USD'
-                    
-                    trade_type = trade.get('type', trade.get('signal', 'UNKNOWN'))
-                    volume = trade.get('volume', trade.get('lot_size', 0))
-                    profit = trade.get('profit', 0)
-                    
-                    # Manejo robusto de fecha/hora
-                    close_time = trade.get('close_time', trade.get('timestamp', trade.get('time', 'N/A')))
-                    
-                    # Si close_time es un objeto datetime, convertirlo a string
-                    if hasattr(close_time, 'strftime'):
-                        close_time = close_time.strftime('%Y-%m-%d %H:%M:%S')
-                    elif close_time == 'N/A':
-                        close_time = 'Fecha no disponible'
-                    
-                    logger.info(f"🔍 [DEBUG] Processed data - ID: {trade_id}, Symbol: {symbol}, Time: {close_time}")
-                    
-                    # Emojis simples y seguros
-                    profit_emoji = "✅" if profit > 0 else "❌" if profit < 0 else "⚪"
-                    type_emoji = "📈" if trade_type == "BUY" else "📉" if trade_type == "SELL" else "📊"
-                    
-                    history_text += f"""
-{profit_emoji} Trade #{trade_id}
-{type_emoji} {symbol} - {trade_type}
-📊 Volumen: {volume}
-💰 P&L: {profit:.2f} USD
-🕒 {close_time}
-
-━━━━━━━━━━━━━━━━━━━━━━
-
-"""
+                parts = ["📋 Historial de Trades (Últimos 10)\n\n"]
+                parts.extend(_fmt_rich(row) for row in rows)
+                history_text = "".join(parts)
             
-            keyboard = [[InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            await query.edit_message_text(
+                history_text.strip(),
+                reply_markup=_BACK_MARKUP,
+                parse_mode='HTML'
+            )
             
-            try:
-                await query.edit_message_text(
-                    history_text.strip(),
-                    reply_markup=reply_markup
-                )
-            except Exception as parse_error:
-                logger.error(f"🔍 [DEBUG] Telegram parse error in history: {parse_error}")
-                # Fallback con emojis básicos solamente
-                if not history:
-                    simple_text = """
-Historial de Trades
-
-No hay trades en el historial aún.
-
-Una vez que el bot comience a operar, verás aquí el historial completo de operaciones.
-                    """
-                else:
-                    simple_text = f"Historial de Trades (Últimos 10)\n\n"
-                    
-                    for i, trade in enumerate(history[:10]):
-                        trade_id = trade.get('id', trade.get('order_id', trade.get('ticket', trade.get('deal', i+1))))
-                        symbol = trade.get('symbol', 'EUR/USD')
-                        # Si symbol está vacío, usar EUR/USD por defecto
-                        if not symbol or symbol.strip() == '':
-                            symbol = 'EUR/USD'
-                        
-                        trade_type = trade.get('type', trade.get('signal', 'UNKNOWN'))
-                        volume = trade.get('volume', trade.get('lot_size', 0))
-                        profit = trade.get('profit', 0)
-                        
-                        # Manejo robusto de fecha/hora
-                        close_time = trade.get('close_time', trade.get('timestamp', trade.get('time', 'N/A')))
-                        
-                        # Si close_time es un objeto datetime, convertirlo a string
-                        if hasattr(close_time, 'strftime'):
-                            close_time = close_time.strftime('%Y-%m-%d %H:%M:%S')
-                        elif close_time == 'N/A':
-                            close_time = 'Fecha no disponible'
-                        
-                        # Solo emojis muy básicos
-                        status_emoji = "+" if profit > 0 else "-" if profit < 0 else "="
-                        
-                        simple_text += f"""
-Trade #{trade_id}
-{symbol} - {trade_type}
-Volumen: {volume}
-P&L: {status_emoji}{profit:.2f} USD
-Fecha: {close_time}
-
----
-
-"""
-                
-                await query.edit_message_text(
-                    simple_text.strip(),
-                    reply_markup=reply_markup
-                )
-                
         except Exception as e:
-            logger.error(f"🔍 [DEBUG] Error in show_history: {e}")
+            logger.error("Error en show_history: %s", e)
             error_text = f"""
 Error obteniendo historial
 
@@ -280,52 +338,17 @@ Error: {str(e)[:100]}
 Solucion: Intenta nuevamente o reinicia el bot.
             """
             
-            keyboard = [[InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
             await query.edit_message_text(
                 error_text.strip(),
-                reply_markup=reply_markup
+                reply_markup=_BACK_MARKUP
             )
     
     async def show_help(self, query):
         """Mostrar ayuda"""
-        help_text = """
-ℹ️ *Ayuda - Forex Trading Bot*
-
-🤖 *¿Qué hace este bot?*
-Este bot opera automáticamente en el par EUR/USD usando análisis técnico avanzado y gestión de riesgo.
-
-📊 *Funciones Principales:*
-• Análisis técnico en tiempo real
-• Trading automatizado 24/5
-• Gestión de riesgo integrada
-• Notificaciones instantáneas
-• Control total desde Telegram
-
-⚙️ *Configuración Recomendada:*
-• Cuenta demo para pruebas
-• Riesgo máximo 2% por trade
-• Stop Loss siempre activo
-• Monitoreo regular del rendimiento
-
-🆘 *Controles de Emergencia:*
-• "Pausar Trading" - Detiene nuevas operaciones
-• "Cerrar Todo" - Cierra todas las posiciones
-• El bot respeta siempre los límites de riesgo
-
-⚠️ *Importante:*
-- Siempre usa cuenta demo primero
-- Nunca inviertas más de lo que puedes perder
-- El trading conlleva riesgos
-        """
-        
-        keyboard = [[InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
-            help_text,
-            reply_markup=reply_markup,
+        await self._edit_if_changed(
+            query,
+            _HELP_TEXT,
+            reply_markup=_BACK_MARKUP,
             parse_mode='Markdown'
         )
     
@@ -333,18 +356,17 @@ Este bot opera automáticamente en el par EUR/USD usando análisis técnico avan
         """Mostrar estadísticas de Machine Learning"""
         try:
             # Obtener estadísticas ML del analizador
-            if hasattr(self.trading_engine, 'analyzer') and hasattr(self.trading_engine.analyzer, 'get_ml_stats'):
-                ml_stats = self.trading_engine.analyzer.get_ml_stats()
+            if self._ml_stats_fn is not None:
+                ml_stats = self._ml_stats_fn()
             else:
                 ml_stats = {'ml_enabled': False}
             
             # Agregar timestamp para evitar contenido duplicado
-            from datetime import datetime
             timestamp = datetime.now().strftime("%H:%M:%S")
             
             if not ml_stats.get('ml_enabled', False):
-                # Mostrar barra de progreso de inicialización ML
-                await self._show_ml_initialization_progress(query, timestamp)
+                # Mostrar estado ML directamente
+                await self._show_ml_ready_state(query, timestamp)
                 return
             else:
                 recent_success = ml_stats.get('recent_success_rate', 0) * 100
@@ -380,186 +402,64 @@ Este bot opera automáticamente en el par EUR/USD usando análisis técnico avan
 ⚡ **Estado:** Sistema ML activo y aprendiendo
                 """
             
-            keyboard = [
-                [InlineKeyboardButton("🔄 Actualizar", callback_data="ml_stats")],
-                [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await query.edit_message_text(
+            await self._edit_if_changed(
+                query,
                 ml_text,
-                reply_markup=reply_markup,
+                reply_markup=_ML_MARKUP,
                 parse_mode='Markdown'
             )
             
         except Exception as e:
-            from datetime import datetime
             error_timestamp = datetime.now().strftime("%H:%M:%S")
             
             # Verificar si es error de mensaje duplicado
             if "Message is not modified" in str(e):
                 error_text = f"""
-🤖 *Machine Learning - Sistema Inicializando*
+🤖 <b>Machine Learning - Sistema Inicializando</b>
 
-⏰ **Actualizado**: {error_timestamp}
+⏰ <b>Actualizado</b>: {error_timestamp}
 
-🔄 **Estado**: El sistema ML se está configurando...
+🔄 <b>Estado</b>: El sistema ML se está configurando...
 
-📊 **Información**:
+📊 <b>Información</b>:
 • Sistema en proceso de inicialización
 • Se activará automáticamente con el primer trade
 • El aprendizaje comenzará una vez que haya datos
 
-🎯 **Para activar**:
+🎯 <b>Para activar</b>:
 1. Asegúrate de que el trading esté activo (▶️ Iniciar Trading)
 2. Espera el primer trade
 3. El ML se activará automáticamente
 
-⚡ **Nota**: Este es el comportamiento normal durante la inicialización
+⚡ <b>Nota</b>: Este es el comportamiento normal durante la inicialización
                 """
             else:
                 error_text = f"""
-❌ *Error en Estadísticas ML*
+❌ <b>Error en Estadísticas ML</b>
 
-⏰ **Hora**: {error_timestamp}
+⏰ <b>Hora</b>: {error_timestamp}
 
 No se pudieron obtener las estadísticas de Machine Learning.
 
-🔧 **Detalles técnicos**: {str(e)[:100]}...
+🔧 <b>Detalles técnicos</b>: {_esc(str(e)[:100])}...
 
-🎯 **Solución**: Reinicia el bot para recargar el sistema ML
+🎯 <b>Solución</b>: Reinicia el bot para recargar el sistema ML
                 """
             
-            keyboard = [
-                [InlineKeyboardButton("🔄 Reintentar", callback_data="ml_stats")],
-                [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
             await query.edit_message_text(
                 error_text,
-                reply_markup=reply_markup,
-                parse_mode='Markdown'
+                reply_markup=_ML_RETRY_MARKUP,
+                parse_mode='HTML'
             )
     
-    async def _show_ml_initialization_progress(self, query, timestamp):
-        """Mostrar progreso de inicialización del sistema ML"""
-        import asyncio
-        
-        # Simular progreso de inicialización ML
-        steps = [
-            (0, "Inicializando sistema ML..."),
-            (15, "Cargando datos de aprendizaje..."),
-            (30, "Configurando parámetros adaptativos..."),
-            (45, "Inicializando redes neuronales..."),
-            (60, "Calibrando algoritmos de optimización..."),
-            (75, "Preparando sistema de aprendizaje continuo..."),
-            (90, "Finalizando configuración ML..."),
-            (100, "Sistema ML listo para activación")
-        ]
-        
-        for percentage, step_description in steps:
-            await self._update_ml_progress(query, percentage, step_description, timestamp)
-            await asyncio.sleep(0.8)
-        
-        # Mostrar estado final
-        await self._show_ml_ready_state(query, timestamp)
-    
-    async def _update_ml_progress(self, query, percentage: int, step_description: str, timestamp: str):
-        """Actualizar barra de progreso ML"""
-        
-        # Crear barra de progreso
-        filled_blocks = int(percentage / 5)
-        empty_blocks = 20 - filled_blocks
-        progress_bar = "■" * filled_blocks + "□" * empty_blocks
-        
-        # Determinar emoji de estado
-        if percentage == 0:
-            status_emoji = "🔄"
-        elif percentage < 100:
-            status_emoji = "⚡"
-        else:
-            status_emoji = "✅"
-        
-        progress_text = f"""
-🧠 *Machine Learning - Inicializando*
-
-{status_emoji} *Progreso*: {percentage}%
-{progress_bar}
-
-📋 *Estado Actual*: {step_description}
-
-⏰ *Actualizado*: {timestamp}
-🎯 *Proceso*: Configuración del Sistema ML
-
-💡 *Información*:
-• Carga de algoritmos de aprendizaje
-• Configuración de parámetros adaptativos
-• Preparación para aprendizaje continuo
-• Calibración de redes neuronales
-
-🔄 *Próximo*: Sistema listo para primer trade
-        """
-        
-        try:
-            await query.edit_message_text(
-                progress_text.strip(),
-                parse_mode='Markdown'
-            )
-        except Exception:
-            try:
-                plain_text = progress_text.replace('*', '').replace('_', '')
-                await query.edit_message_text(plain_text.strip())
-            except Exception:
-                pass
-    
     async def _show_ml_ready_state(self, query, timestamp):
         """Mostrar estado final del ML listo"""
         
-        final_text = f"""
-🧠 *Machine Learning - Sistema Listo*
-
-✅ *Estado*: Configuración completada
-■■■■■■■■■■■■■■■■■■■■
-
-📋 *Sistema ML*: Listo para activación
-
-⏰ *Actualizado*: {timestamp}
-🎯 *Estado*: Esperando primer trade
-
-💡 *Información*:
-• Sistema ML completamente configurado
-• Algoritmos de aprendizaje listos
-• Se activará automáticamente con el primer trade
-• Comenzará optimización continua
-
-🚀 *Para activar*:
-1. Inicia el trading (▶️ Iniciar Trading)
-2. Espera el primer trade
-3. El ML se activará automáticamente
-4. Comenzará el aprendizaje continuo
-
-⚡ *Nota*: El sistema está listo y esperando datos
-        """
-        
-        keyboard = [
-            [InlineKeyboardButton("🔄 Actualizar", callback_data="ml_stats")],
-            [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        final_text = _ML_READY_TMPL.format(timestamp=timestamp)
         
-        try:
-            await query.edit_message_text(
-                final_text.strip(),
-                reply_markup=reply_markup,
-                parse_mode='Markdown'
-            )
-        except Exception:
-            try:
-                plain_text = final_text.replace('*', '').replace('_', '')
-                await query.edit_message_text(
-                    plain_text.strip(),
-                    reply_markup=reply_markup
-                )
-            except Exception:
-                pass
+        await self._edit_if_changed(
+            query,
+            final_text.strip(),
+            reply_markup=_ML_MARKUP,
+            parse_mode='HTML'
+        )
@@ -4,16 +4,26 @@ Handlers para optimización y configuración
 
 import os
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-from dotenv import load_dotenv, set_key
 from datetime import datetime
+from ...utils.tasks import fire_and_forget
 
-class OptimizationHandlers:
-    def __init__(self, trading_engine):
-        self.trading_engine = trading_engine
-    
-    async def show_optimize_menu(self, query):
-        """Mostrar menú de optimización"""
-        optimize_text = """
+# Teclados estáticos compartidos por todos los callbacks
+_BACK_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
+])
+_OPTIMIZE_MENU_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🎯 Demo Optimizada", callback_data="opt_demo")],
+    [InlineKeyboardButton("🛡️ Conservadora", callback_data="opt_conservative")],
+    [InlineKeyboardButton("🚀 Agresiva", callback_data="opt_aggressive")],
+    [InlineKeyboardButton("📊 Ver Config Actual", callback_data="opt_current")],
+    [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
+])
+_CURRENT_CONFIG_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🎯 Optimizar", callback_data="optimize")],
+    [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
+])
+
+_OPTIMIZE_MENU_TEXT = """
 🎯 *Optimización de Configuración*
 
 Selecciona el tipo de optimización que deseas aplicar:
@@ -33,78 +43,137 @@ Selecciona el tipo de optimización que deseas aplicar:
    • Pérdida máxima: $300/día
    • Trades: Hasta 15/día
         """
+
+_OPT_RESULT_HEADER_TMPL = """
+✅ *Configuración {config_name} Aplicada*
+
+Los siguientes parámetros han sido actualizados:
+
+"""
+
+_OPT_RESULT_FOOTER = """
+⚠️ **Importante**: Los cambios se aplicarán en el próximo análisis de mercado.
+
+Para aplicar completamente, puedes reiniciar el bot si lo deseas.
+        """
+
+# Preset de optimización por callback: (nombre, parámetros del .env)
+_OPT_CONFIGS = {
+    'opt_demo': ("Demo Optimizada", {
+        'RISK_PERCENTAGE': '2.5',
+        'MAX_DAILY_LOSS': '150.0',
+        'TRADE_AMOUNT': '0.15',
+        'STOP_LOSS_PIPS': '18',
+        'TAKE_PROFIT_PIPS': '45'
+    }),
+    'opt_conservative': ("Conservadora", {
+        'RISK_PERCENTAGE': '1.0',
+        'MAX_DAILY_LOSS': '50.0',
+        'TRADE_AMOUNT': '0.05',
+        'STOP_LOSS_PIPS': '25',
+        'TAKE_PROFIT_PIPS': '35'
+    }),
+    'opt_aggressive': ("Agresiva", {
+        'RISK_PERCENTAGE': '3.0',
+        'MAX_DAILY_LOSS': '300.0',
+        'TRADE_AMOUNT': '0.25',
+        'STOP_LOSS_PIPS': '15',
+        'TAKE_PROFIT_PIPS': '50'
+    })
+}
+
+_ENV_FILE = '.env'
+
+_CONFIG_DEFAULTS = (
+    ('RISK_PERCENTAGE', '2.0'),
+    ('MAX_DAILY_LOSS', '100.0'),
+    ('TRADE_AMOUNT', '0.1'),
+    ('STOP_LOSS_PIPS', '20'),
+    ('TAKE_PROFIT_PIPS', '40')
+)
+
+_CURRENT_CONFIG_TMPL = """
+📊 *Configuración Actual*
+
+💰 **Gestión de Riesgo:**
+• Riesgo por Trade: {RISK_PERCENTAGE}%
+• Pérdida Máxima Diaria: ${MAX_DAILY_LOSS}
+• Tamaño de Trade: {TRADE_AMOUNT} lotes
+
+📊 **Stops:**
+• Stop Loss: {STOP_LOSS_PIPS} pips
+• Take Profit: {TAKE_PROFIT_PIPS} pips
+
+🤖 **Bot:**
+• Análisis: Cada 3 minutos
+• Confianza Mínima: 75%
+• Máx. Posiciones: 3 simultáneas
+        """
+
+def _get_env_config():
+    """Obtener la configuración activa desde las variables de entorno del proceso"""
+    return {key: os.getenv(key, default) for key, default in _CONFIG_DEFAULTS}
+
+def _write_env_values(values):
+    """Actualizar varias claves del .env con una sola lectura y una escritura atómica"""
+    try:
+        with open(_ENV_FILE, encoding='utf-8') as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        lines = []
+    
+    pending = dict(values)
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#') or '=' not in stripped:
+            continue
+        key = stripped.split('=', 1)[0].strip()
+        if key in pending:
+            lines[i] = f"{key}={pending.pop(key)}\n"
+    
+    if lines and not lines[-1].endswith('\n'):
+        lines[-1] += '\n'
+    lines.extend(f"{key}={value}\n" for key, value in pending.items())
+    
+    tmp_file = _ENV_FILE + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+    os.replace(tmp_file, _ENV_FILE)
+    
+    # Reflejar los valores en el proceso: la configuración se lee de os.environ
+    os.environ.update(values)
+
+class OptimizationHandlers:
+    def __init__(self, trading_engine):
+        self.trading_engine = trading_engine
+    
+    async def show_optimize_menu(self, query):
+        """Mostrar menú de optimización"""
+        reply_markup = _OPTIMIZE_MENU_MARKUP
         
-        keyboard = [
-            [InlineKeyboardButton("🎯 Demo Optimizada", callback_data="opt_demo")],
-            [InlineKeyboardButton("🛡️ Conservadora", callback_data="opt_conservative")],
-            [InlineKeyboardButton("🚀 Agresiva", callback_data="opt_aggressive")],
-            [InlineKeyboardButton("📊 Ver Config Actual", callback_data="opt_current")],
-            [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
-            optimize_text,
+        fire_and_forget(query.edit_message_text(
+            _OPTIMIZE_MENU_TEXT,
             reply_markup=reply_markup,
             parse_mode='Markdown'
-        )
+        ))
     
     async def handle_optimization(self, query, data):
         """Manejar optimizaciones"""
-        if data == "opt_demo":
-            config = {
-                'RISK_PERCENTAGE': '2.5',
-                'MAX_DAILY_LOSS': '150.0',
-                'TRADE_AMOUNT': '0.15',
-                'STOP_LOSS_PIPS': '18',
-                'TAKE_PROFIT_PIPS': '45'
-            }
-            config_name = "Demo Optimizada"
-        elif data == "opt_conservative":
-            config = {
-                'RISK_PERCENTAGE': '1.0',
-                'MAX_DAILY_LOSS': '50.0',
-                'TRADE_AMOUNT': '0.05',
-                'STOP_LOSS_PIPS': '25',
-                'TAKE_PROFIT_PIPS': '35'
-            }
-            config_name = "Conservadora"
-        elif data == "opt_aggressive":
-            config = {
-                'RISK_PERCENTAGE': '3.0',
-                'MAX_DAILY_LOSS': '300.0',
-                'TRADE_AMOUNT': '0.25',
-                'STOP_LOSS_PIPS': '15',
-                'TAKE_PROFIT_PIPS': '50'
-            }
-            config_name = "Agresiva"
-        elif data == "opt_current":
+        entry = _OPT_CONFIGS.get(data)
+        if entry is None:
             await self.show_current_config(query)
             return
+        config_name, config = entry
         
         # Aplicar configuración
-        env_file = '.env'
-        for key, value in config.items():
-            set_key(env_file, key, value)
+        _write_env_values(config)
         
-        result_text = f"""
-✅ *Configuración {config_name} Aplicada*
-
-Los siguientes parámetros han sido actualizados:
-
-"""
-        for key, value in config.items():
-            result_text += f"• {key}: {value}\n"
+        parts = [_OPT_RESULT_HEADER_TMPL.format(config_name=config_name)]
+        parts.extend(f"• {key}: {value}\n" for key, value in config.items())
+        parts.append(_OPT_RESULT_FOOTER)
+        result_text = "".join(parts)
         
-        result_text += """
-⚠️ **Importante**: Los cambios se aplicarán en el próximo análisis de mercado.
-
-Para aplicar completamente, puedes reiniciar el bot si lo deseas.
-        """
-        
-        keyboard = [[InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = _BACK_MARKUP
         
         await query.edit_message_text(
             result_text,
@@ -114,31 +183,9 @@ Para aplicar completamente, puedes reiniciar el bot si lo deseas.
     
     async def show_current_config(self, query):
         """Mostrar configuración actual"""
-        load_dotenv()
-        
-        config_text = f"""
-📊 *Configuración Actual*
-
-💰 **Gestión de Riesgo:**
-• Riesgo por Trade: {os.getenv('RISK_PERCENTAGE', '2.0')}%
-• Pérdida Máxima Diaria: ${os.getenv('MAX_DAILY_LOSS', '100.0')}
-• Tamaño de Trade: {os.getenv('TRADE_AMOUNT', '0.1')} lotes
-
-📊 **Stops:**
-• Stop Loss: {os.getenv('STOP_LOSS_PIPS', '20')} pips
-• Take Profit: {os.getenv('TAKE_PROFIT_PIPS', '40')} pips
-
-🤖 **Bot:**
-• Análisis: Cada 3 minutos
-• Confianza Mínima: 75%
-• Máx. Posiciones: 3 simultáneas
-        """
+        config_text = _CURRENT_CONFIG_TMPL.format(**_get_env_config())
         
-        keyboard = [
-            [InlineKeyboardButton("🎯 Optimizar", callback_data="optimize")],
-            [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = _CURRENT_CONFIG_MARKUP
         
         await query.edit_message_text(
             config_text,
@@ -170,11 +217,10 @@ Para aplicar completamente, puedes reiniciar el bot si lo deseas.
 📱 Notificaciones: {'Activadas' if settings['notifications'] else 'Desactivadas'}
         """
         
-        keyboard = [[InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = _BACK_MARKUP
         
-        await query.edit_message_text(
+        fire_and_forget(query.edit_message_text(
             settings_text,
             reply_markup=reply_markup,
             parse_mode='Markdown'
-        )
+        ))
@@ -4,30 +4,165 @@ Handlers para funciones de trading
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from datetime import datetime
+import asyncio
+import logging
+from ...utils.async_cache import async_ttl_cache, invalidate_cache
+from ...utils.tasks import fire_and_forget
+from .engine_cache import cached_get_status, cached_get_balance, cached_get_positions, cached_get_analysis
+from .loading import load_with_placeholder
+
+logger = logging.getLogger(__name__)
+
+# Teclados estáticos compartidos por todos los callbacks
+_BACK_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
+])
+_POSITIONS_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔄 Actualizar", callback_data="positions")],
+    [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
+])
+_ANALYSIS_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔄 Actualizar", callback_data="analysis")],
+    [InlineKeyboardButton("📊 Multi-TF", callback_data="mtf_analysis")],
+    [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
+])
+_MTF_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔄 Actualizar MTF", callback_data="mtf_analysis")],
+    [InlineKeyboardButton("📈 Análisis Simple", callback_data="analysis")],
+    [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
+])
+_MTF_ERROR_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📈 Análisis Simple", callback_data="analysis")],
+    [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
+])
+
+_TRADING_STARTED_TEXT = """
+▶️ *Trading Iniciado*
+
+🟢 El bot está ahora operando automáticamente
+📊 Monitoreando EUR/USD en tiempo real
+🎯 Buscando oportunidades de trading
+
+⚠️ *Recordatorio*:
+• El bot opera con gestión de riesgo
+• Todas las operaciones tienen Stop Loss
+• Puedes pausar en cualquier momento
+                """
+
+_TRADING_STOPPED_TEXT = """
+⏸️ *Trading Pausado*
+
+🔴 El bot ha pausado las operaciones automáticas
+📊 Las posiciones abiertas permanecen activas
+🔄 Puedes reanudar cuando desees
+
+Las posiciones existentes seguirán siendo monitoreadas.
+        """
+
+_MTF_UNAVAILABLE_TEXT = """
+📊 *Multi-Timeframe Analysis - No Disponible*
+
+⚠️ **Estado**: MTF no está configurado
+
+🔧 **Razón**: 
+• Sistema Multi-Timeframe no inicializado
+• Requiere reinicio del bot para activación
+
+💡 **Para activar**:
+1. Reinicia el bot
+2. MTF se activará automáticamente
+3. Análisis de H1, M15, M5, M1 simultáneo
+
+🎯 **Beneficios del MTF**:
+• +25-35% mejor precisión
+• Confirmación cruzada de señales
+• Análisis de tendencia principal (H1)
+• Timing preciso (M1)
+                """
+
+_MTF_HEADER_TMPL = """
+🎯 *Multi-Timeframe Analysis*
+
+{signal_emoji} **Señal Global**: {signal}
+📊 **Confianza**: {confidence:.1f}%
+{convergence_emoji} **Convergencia**: {convergence}
+📈 **Alineación**: {alignment:.1%}
+
+"""
+
+_MTF_FOOTER_TMPL = """
+
+🔍 **Tipo de Análisis**: {analysis_type}
+⏰ **Actualizado**: {timestamp}
+
+💡 **Interpretación**:
+• 🟢 HIGH: Todos los timeframes alineados
+• 🟡 MEDIUM: Mayoría de timeframes alineados  
+• 🔴 LOW: Timeframes en conflicto
+
+🎯 **Recomendación**: {recommendation}
+                """
+
+_ERROR_TMPL = """{title}
+
+{description}
+
+Error: {error}
+
+Solucion: Intenta nuevamente o reinicia el bot."""
+
+_COMMA_TO_SPACE = str.maketrans({',': ' '})
+
+# Caracteres de marcado que se eliminan de los textos libres del analizador
+_MD_STRIP = str.maketrans('', '', '*_[]')
+
+def _fmt_money(value: float) -> str:
+    """Formatear un importe con espacios como separador de miles"""
+    return f"{value:,.2f}".translate(_COMMA_TO_SPACE)
+
+@async_ttl_cache(3.0, tag='analysis')
+async def _cached_mtf_analysis(analyzer):
+    """Análisis MTF junto con la hora en que se calculó"""
+    result = await analyzer.should_trade_premium_mtf()
+    return result, datetime.now().strftime('%H:%M:%S')
 
 class TradingHandlers:
     def __init__(self, trading_engine):
         self.trading_engine = trading_engine
+        self._prefetch_task = None
+        
+        # MTF solo se activa al iniciar el motor: basta con comprobarlo una vez
+        analyzer = getattr(trading_engine, 'analyzer', None)
+        self._mtf_available = bool(getattr(analyzer, 'mtf_enabled', False))
+    
+    def prefetch_dashboard(self):
+        """Precargar en segundo plano estado, balance y posiciones"""
+        if self._prefetch_task is None or self._prefetch_task.done():
+            self._prefetch_task = asyncio.create_task(self._prefetch_dashboard())
+    
+    async def _prefetch_dashboard(self):
+        """Consultar en paralelo los datos del menú y dejarlos en caché"""
+        await asyncio.gather(
+            cached_get_status(self.trading_engine),
+            cached_get_balance(self.trading_engine),
+            cached_get_positions(self.trading_engine),
+            return_exceptions=True
+        )
+    
+    async def _send_error(self, query, title: str, description: str, error, reply_markup=_BACK_MARKUP):
+        """Mostrar un error (excepción o mensaje del motor) en texto plano con el botón de volver"""
+        await query.edit_message_text(
+            _ERROR_TMPL.format(title=title, description=description, error=str(error)[:100]),
+            reply_markup=reply_markup
+        )
     
     async def show_status(self, query):
         """Mostrar estado del bot"""
         try:
-            import logging
-            logger = logging.getLogger(__name__)
-            
-            logger.info("🔍 [DEBUG] Iniciando show_status")
-            logger.info(f"🔍 [DEBUG] Trading engine type: {type(self.trading_engine)}")
-            logger.info(f"🔍 [DEBUG] Trading engine methods: {[method for method in dir(self.trading_engine) if 'get_status' in method]}")
-            
-            # Verificar si el método existe
-            if not hasattr(self.trading_engine, 'get_status'):
-                logger.error("❌ [DEBUG] get_status method NOT FOUND!")
-                logger.error(f"❌ [DEBUG] Available methods: {[method for method in dir(self.trading_engine) if method.startswith('get_')]}")
-                raise AttributeError("get_status method not found")
-            
-            logger.info("✅ [DEBUG] get_status method found, calling it...")
-            status = await self.trading_engine.get_status()
-            logger.info(f"✅ [DEBUG] get_status returned: {status}")
+            # Mostrar el aviso de carga mientras se consulta el motor
+            status = await load_with_placeholder(
+                query, "⏳ Cargando estado...", cached_get_status(self.trading_engine)
+            )
             
             # Limpiar valores para evitar errores de parsing
             trading_status = "🟢 Activo" if status.get('trading_active', False) else "🔴 Inactivo"
@@ -40,8 +175,8 @@ class TradingHandlers:
             current_session = status.get('current_session', 'Desconocida')
             
             # Limpiar valores para evitar caracteres problemáticos
-            balance_str = f"{balance:,.2f}".replace(',', ' ')
-            equity_str = f"{equity:,.2f}".replace(',', ' ')
+            balance_str = _fmt_money(balance)
+            equity_str = _fmt_money(equity)
             
             status_text = f"""
 📊 Estado del Bot
@@ -61,69 +196,24 @@ class TradingHandlers:
 • Risk Management: Activo
             """
             
-            keyboard = [[InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            try:
-                await query.edit_message_text(
-                    status_text,
-                    reply_markup=reply_markup
-                )
-            except Exception as parse_error:
-                # Fallback sin emojis si hay problemas de parsing
-                simple_text = f"""
-Estado del Bot
-
-Trading: {trading_status}
-Ultimo Analisis: {last_analysis}
-Trades Hoy: {trades_today}
-Balance: {balance_str} USD
-Equity: {equity_str} USD
-Posiciones Abiertas: {open_positions}
-Confianza Minima: {min_confidence}%
-Sesion Actual: {current_session}
-
-Configuracion:
-- Multi-Timeframe Analysis: Activo
-- Machine Learning: Activo
-- Risk Management: Activo
-                """
-                await query.edit_message_text(
-                    simple_text.strip(),
-                    reply_markup=reply_markup
-                )
-            
-        except Exception as e:
-            error_text = f"""
-Error obteniendo estado
-
-No se pudo obtener el estado del bot.
-
-Error: {str(e)[:100]}
-
-Solucion: Intenta nuevamente o reinicia el bot.
-            """
-            
-            keyboard = [[InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = _BACK_MARKUP
             
+            # Texto plano (sin parse_mode): no hay marcado que pueda fallar al parsear
             await query.edit_message_text(
-                error_text.strip(),
+                status_text,
                 reply_markup=reply_markup
             )
+            
+        except Exception as e:
+            await self._send_error(query, "Error obteniendo estado", "No se pudo obtener el estado del bot.", e)
     
     async def show_balance(self, query):
         """Mostrar balance de la cuenta"""
-        import logging
-        logger = logging.getLogger(__name__)
-        
-        logger.info("🔍 [DEBUG] show_balance called")
-        logger.info(f"🔍 [DEBUG] Trading engine has get_balance: {hasattr(self.trading_engine, 'get_balance')}")
-        
         try:
-            logger.info("🔍 [DEBUG] Calling get_balance...")
-            balance_info = await self.trading_engine.get_balance()
-            logger.info(f"🔍 [DEBUG] get_balance returned: {balance_info}")
+            balance_info = await load_with_placeholder(
+                query, "⏳ Cargando balance...", cached_get_balance(self.trading_engine)
+            )
+            logger.debug("get_balance: %s", balance_info)
             
             # Limpiar valores para evitar errores de parsing
             balance = balance_info.get('balance', 0)
@@ -151,8 +241,7 @@ Solucion: Intenta nuevamente o reinicia el bot.
 🛡️ Pérdida Máxima Diaria: {max_daily_loss:,.2f} USD
             """
             
-            keyboard = [[InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = _BACK_MARKUP
             
             await query.edit_message_text(
                 balance_text.strip(),
@@ -160,65 +249,41 @@ Solucion: Intenta nuevamente o reinicia el bot.
             )
             
         except Exception as e:
-            logger.error(f"🔍 [DEBUG] Error in show_balance: {e}")
-            error_text = f"""
-Error obteniendo balance
-
-No se pudo obtener la información de balance.
-
-Error: {str(e)[:100]}
-
-Solucion: Intenta nuevamente o reinicia el bot.
-            """
-            
-            keyboard = [[InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await query.edit_message_text(
-                error_text.strip(),
-                reply_markup=reply_markup
-            )
+            logger.error("Error en show_balance: %s", e)
+            await self._send_error(query, "Error obteniendo balance", "No se pudo obtener la información de balance.", e)
     
     async def show_analysis(self, query):
         """Mostrar análisis del mercado EUR/USD"""
-        import logging
-        logger = logging.getLogger(__name__)
-        
-        logger.info("🔍 [DEBUG] show_analysis called")
-        
         try:
-            logger.info("🔍 [DEBUG] Calling get_market_analysis...")
-            analysis = await self.trading_engine.get_market_analysis()
-            logger.info(f"🔍 [DEBUG] get_market_analysis returned: {analysis}")
+            analysis = await load_with_placeholder(
+                query, "⏳ Cargando análisis...", cached_get_analysis(self.trading_engine)
+            )
+            logger.debug("get_market_analysis: %s", analysis)
             
             if 'error' in analysis:
-                analysis_text = f"""
-Error en Análisis EUR/USD
-
-No se pudo obtener el análisis del mercado.
-
-Error: {analysis['error'][:100]}
-
-Solución: Intenta nuevamente o verifica la conexión MT5.
-                """
-            else:
-                # Limpiar valores para evitar errores de parsing
-                current_price = analysis.get('current_price', 0)
-                trend = analysis.get('trend', 'UNKNOWN')
-                signal = analysis.get('signal', 'HOLD')
-                confidence = analysis.get('confidence', 0)
-                rsi = analysis.get('rsi', 0)
-                bb_position = analysis.get('bb_position', 'Middle')
-                sma20 = analysis.get('sma20', current_price)
-                sma50 = analysis.get('sma50', current_price)
-                recommendation = analysis.get('recommendation', 'Sin recomendación')
-                timestamp = analysis.get('timestamp', 'Desconocido')
-                current_session = analysis.get('current_session', 'Desconocida')
-                
-                # Limpiar recommendation para evitar caracteres problemáticos
-                recommendation_clean = str(recommendation).replace('*', '').replace('_', '').replace('[', '').replace(']', '')
-                
-                analysis_text = f"""
+                await self._send_error(
+                    query, "Error en Análisis EUR/USD", "No se pudo obtener el análisis del mercado.",
+                    analysis['error'], reply_markup=_ANALYSIS_MARKUP
+                )
+                return
+            
+            # Limpiar valores para evitar errores de parsing
+            current_price = analysis.get('current_price', 0)
+            trend = analysis.get('trend', 'UNKNOWN')
+            signal = analysis.get('signal', 'HOLD')
+            confidence = analysis.get('confidence', 0)
+            rsi = analysis.get('rsi', 0)
+            bb_position = analysis.get('bb_position', 'Middle')
+            sma20 = analysis.get('sma20', current_price)
+            sma50 = analysis.get('sma50', current_price)
+            recommendation = analysis.get('recommendation', 'Sin recomendación')
+            timestamp = analysis.get('timestamp', 'Desconocido')
+            current_session = analysis.get('current_session', 'Desconocida')
+            
+            # Limpiar recommendation para evitar caracteres problemáticos
+            recommendation_clean = str(recommendation).translate(_MD_STRIP)
+            
+            analysis_text = f"""
 📈 Análisis EUR/USD
 
 💱 Precio Actual: {current_price:.5f}
@@ -235,69 +300,23 @@ Solución: Intenta nuevamente o verifica la conexión MT5.
 🎯 Recomendación: {recommendation_clean}
 🌍 Sesión: {current_session}
 🕒 Actualizado: {timestamp}
-                """
-            
-            keyboard = [
-                [InlineKeyboardButton("🔄 Actualizar", callback_data="analysis")],
-                [InlineKeyboardButton("📊 Multi-TF", callback_data="mtf_analysis")],
-                [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            try:
-                await query.edit_message_text(
-                    analysis_text.strip(),
-                    reply_markup=reply_markup
-                )
-            except Exception as parse_error:
-                logger.error(f"🔍 [DEBUG] Telegram parse error: {parse_error}")
-                # Fallback sin emojis si hay problemas de parsing
-                simple_text = f"""
-Analisis EUR/USD
-
-Precio Actual: {current_price:.5f}
-Tendencia: {trend}
-Señal: {signal}
-Confianza: {confidence:.1f}%
-
-Indicadores Tecnicos:
-RSI: {rsi:.1f}
-Bollinger: {bb_position}
-SMA 20: {sma20:.5f}
-SMA 50: {sma50:.5f}
-
-Recomendacion: {recommendation_clean}
-Sesion: {current_session}
-Actualizado: {timestamp}
-                """
-                await query.edit_message_text(
-                    simple_text.strip(),
-                    reply_markup=reply_markup
-                )
-            
-        except Exception as e:
-            logger.error(f"🔍 [DEBUG] Error in show_analysis: {e}")
-            error_text = f"""
-Error en Analisis
-
-No se pudo obtener el analisis del mercado.
-
-Error: {str(e)[:100]}
-
-Solucion: Intenta nuevamente o reinicia el bot.
             """
             
-            keyboard = [[InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = _ANALYSIS_MARKUP
             
+            # Texto plano (sin parse_mode): no hay marcado que pueda fallar al parsear
             await query.edit_message_text(
-                error_text.strip(),
+                analysis_text.strip(),
                 reply_markup=reply_markup
             )
+            
+        except Exception as e:
+            logger.error("Error en show_analysis: %s", e)
+            await self._send_error(query, "Error en Analisis", "No se pudo obtener el analisis del mercado.", e)
     
     async def show_positions(self, query):
         """Mostrar posiciones abiertas"""
-        positions = await self.trading_engine.get_open_positions()
+        positions = await cached_get_positions(self.trading_engine)
         
         if not positions:
             positions_text = """
@@ -308,10 +327,8 @@ Solucion: Intenta nuevamente o reinicia el bot.
 El bot está monitoreando el mercado en busca de oportunidades de trading.
             """
         else:
-            positions_text = "🔍 *Posiciones Abiertas*\n\n"
-            
-            for i, pos in enumerate(positions, 1):
-                positions_text += f"""
+            parts = ["🔍 *Posiciones Abiertas*\n\n"]
+            parts.extend(f"""
 📊 *Posición #{i}*
 💱 Par: {pos['symbol']}
 📈 Tipo: {pos['type']}
@@ -322,13 +339,10 @@ El bot está monitoreando el mercado en busca de oportunidades de trading.
 🕒 Tiempo: {pos['open_time']}
 
 ---
-                """
+                """ for i, pos in enumerate(positions, 1))
+            positions_text = "".join(parts)
         
-        keyboard = [
-            [InlineKeyboardButton("🔄 Actualizar", callback_data="positions")],
-            [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = _POSITIONS_MARKUP
         
         await query.edit_message_text(
             positions_text,
@@ -340,79 +354,54 @@ El bot está monitoreando el mercado en busca de oportunidades de trading.
         """Iniciar trading automatizado"""
         try:
             result = await self.trading_engine.start_trading()
-            
-            if result.get('success', False):
-                message = """
-▶️ *Trading Iniciado*
-
-🟢 El bot está ahora operando automáticamente
-📊 Monitoreando EUR/USD en tiempo real
-🎯 Buscando oportunidades de trading
-
-⚠️ *Recordatorio*:
-• El bot opera con gestión de riesgo
-• Todas las operaciones tienen Stop Loss
-• Puedes pausar en cualquier momento
-                """
-            else:
-                error_msg = str(result.get('error', 'Error desconocido'))[:100]
-                message = f"""
-❌ *Error al Iniciar Trading*
-
-{error_msg}
-
-Por favor, verifica la conexión y configuración.
-                """
+            invalidate_cache('status')
         except Exception as e:
-            error_msg = str(e)[:100]
-            message = f"""
-❌ *Error Crítico*
-
-No se pudo iniciar el trading.
-
-Error: {error_msg}
-
-Intenta reiniciar el bot.
-            """
+            await self._send_error(query, "Error Crítico", "No se pudo iniciar el trading.", e)
+            return
         
-        keyboard = [[InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        if not result.get('success', False):
+            await self._send_error(
+                query, "Error al Iniciar Trading", "Verifica la conexión y configuración.",
+                result.get('error', 'Error desconocido')
+            )
+            return
         
         await query.edit_message_text(
-            message,
-            reply_markup=reply_markup,
+            _TRADING_STARTED_TEXT,
+            reply_markup=_BACK_MARKUP,
             parse_mode='Markdown'
         )
     
     async def stop_trading(self, query):
         """Pausar trading automatizado"""
         result = await self.trading_engine.stop_trading()
+        invalidate_cache('status')
         
-        message = """
-⏸️ *Trading Pausado*
-
-🔴 El bot ha pausado las operaciones automáticas
-📊 Las posiciones abiertas permanecen activas
-🔄 Puedes reanudar cuando desees
-
-Las posiciones existentes seguirán siendo monitoreadas.
-        """
-        
-        keyboard = [[InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = _BACK_MARKUP
         
-        await query.edit_message_text(
-            message,
+        fire_and_forget(query.edit_message_text(
+            _TRADING_STOPPED_TEXT,
             reply_markup=reply_markup,
             parse_mode='Markdown'
-        )
+        ))
     
     async def close_all_positions(self, query):
         """Cerrar todas las posiciones"""
-        result = await self.trading_engine.close_all_positions()
+        try:
+            result = await self.trading_engine.close_all_positions()
+        except Exception as e:
+            await self._send_error(query, "Error al Cerrar Posiciones", "No se pudieron cerrar las posiciones.", e)
+            return
         
-        if result['success']:
-            message = f"""
+        if not result.get('success', False):
+            await self._send_error(
+                query, "Error al Cerrar Posiciones",
+                "Algunas posiciones pueden no haberse cerrado correctamente.",
+                result.get('error', 'Error desconocido')
+            )
+            return
+        
+        message = f"""
 🆘 *Todas las Posiciones Cerradas*
 
 ✅ Se cerraron {result['closed_count']} posiciones
@@ -420,56 +409,26 @@ Las posiciones existentes seguirán siendo monitoreadas.
 
 Todas las operaciones han sido cerradas exitosamente.
             """
-        else:
-            message = f"""
-❌ *Error al Cerrar Posiciones*
-
-{result['error']}
-
-Algunas posiciones pueden no haberse cerrado correctamente.
-            """
-        
-        keyboard = [[InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
         
         await query.edit_message_text(
             message,
-            reply_markup=reply_markup,
+            reply_markup=_BACK_MARKUP,
             parse_mode='Markdown'
         )
     
     async def show_mtf_analysis(self, query):
         """Mostrar análisis Multi-Timeframe detallado"""
         try:
-            from datetime import datetime
-            
-            # Verificar si MTF está disponible
-            analyzer = self.trading_engine.analyzer
-            
-            if not hasattr(analyzer, 'mtf_enabled') or not analyzer.mtf_enabled:
-                mtf_text = """
-📊 *Multi-Timeframe Analysis - No Disponible*
-
-⚠️ **Estado**: MTF no está configurado
-
-🔧 **Razón**: 
-• Sistema Multi-Timeframe no inicializado
-• Requiere reinicio del bot para activación
-
-💡 **Para activar**:
-1. Reinicia el bot
-2. MTF se activará automáticamente
-3. Análisis de H1, M15, M5, M1 simultáneo
-
-🎯 **Beneficios del MTF**:
-• +25-35% mejor precisión
-• Confirmación cruzada de señales
-• Análisis de tendencia principal (H1)
-• Timing preciso (M1)
-                """
+            # Disponibilidad de MTF calculada al crear el handler
+            if not self._mtf_available:
+                mtf_text = _MTF_UNAVAILABLE_TEXT
             else:
+                analyzer = self.trading_engine.analyzer
+                
                 # Obtener análisis MTF
-                should_trade, signal, trade_info = await analyzer.should_trade_premium_mtf()
+                (should_trade, signal, trade_info), analysis_time = await load_with_placeholder(
+                    query, "⏳ Cargando análisis Multi-Timeframe...", _cached_mtf_analysis(analyzer)
+                )
                 
                 # Extraer información MTF
                 mtf_analysis = trade_info.get('mtf_analysis', {})
@@ -487,33 +446,25 @@ Algunas posiciones pueden no haberse cerrado correctamente.
                 signal_emoji = "📈" if signal == 'BUY' else "📉" if signal == 'SELL' else "⏸️"
                 convergence_emoji = "🟢" if convergence == 'HIGH' else "🟡" if convergence == 'MEDIUM' else "🔴"
                 
-                mtf_text = f"""
-🎯 *Multi-Timeframe Analysis*
-
-{signal_emoji} **Señal Global**: {signal}
-📊 **Confianza**: {trade_info.get('confidence', 0):.1f}%
-{convergence_emoji} **Convergencia**: {convergence}
-📈 **Alineación**: {alignment:.1%}
-
-{mtf_summary}
-
-🔍 **Tipo de Análisis**: {analysis_type}
-⏰ **Actualizado**: {datetime.now().strftime('%H:%M:%S')}
-
-💡 **Interpretación**:
-• 🟢 HIGH: Todos los timeframes alineados
-• 🟡 MEDIUM: Mayoría de timeframes alineados  
-• 🔴 LOW: Timeframes en conflicto
-
-🎯 **Recomendación**: {'✅ OPERAR' if should_trade else '⏸️ ESPERAR'}
-                """
-            
-            keyboard = [
-                [InlineKeyboardButton("🔄 Actualizar MTF", callback_data="mtf_analysis")],
-                [InlineKeyboardButton("📈 Análisis Simple", callback_data="analysis")],
-                [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+                # El resumen puede ser largo: unir las tres piezas en una sola pasada
+                mtf_text = "".join((
+                    _MTF_HEADER_TMPL.format(
+                        signal_emoji=signal_emoji,
+                        signal=signal,
+                        confidence=trade_info.get('confidence', 0),
+                        convergence_emoji=convergence_emoji,
+                        convergence=convergence,
+                        alignment=alignment
+                    ),
+                    mtf_summary,
+                    _MTF_FOOTER_TMPL.format(
+                        analysis_type=analysis_type,
+                        timestamp=analysis_time,
+                        recommendation='✅ OPERAR' if should_trade else '⏸️ ESPERAR'
+                    )
+                ))
+            
+            reply_markup = _MTF_MARKUP
             
             await query.edit_message_text(
                 mtf_text,
@@ -522,26 +473,8 @@ Algunas posiciones pueden no haberse cerrado correctamente.
             )
             
         except Exception as e:
-            error_text = f"""
-❌ *Error en Multi-Timeframe Analysis*
-
-No se pudo obtener el análisis Multi-Timeframe.
-
-🔧 **Error**: {str(e)[:100]}...
-
-💡 **Solución**: 
-• Reinicia el bot para recargar MTF
-• Verifica conexión MT5
-            """
-            
-            keyboard = [
-                [InlineKeyboardButton("📈 Análisis Simple", callback_data="analysis")],
-                [InlineKeyboardButton("🔙 Volver al Menú", callback_data="back_to_menu")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await query.edit_message_text(
-                error_text,
-                reply_markup=reply_markup,
-                parse_mode='Markdown'
+            await self._send_error(
+                query, "Error en Multi-Timeframe Analysis",
+                "No se pudo obtener el análisis Multi-Timeframe. Verifica la conexión MT5.",
+                e, reply_markup=_MTF_ERROR_MARKUP
             )
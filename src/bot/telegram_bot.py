@@ -3,10 +3,16 @@ Bot de Telegram Refactorizado para trading de Forex
 Interfaz principal con navegación por botones - Código limpio y modular
 """
 
+import asyncio
 import logging
+import math
 import os
-from telegram import Update
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
+import signal
+from datetime import datetime
+from telegram import Update, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ParseMode
+from telegram.error import TimedOut, NetworkError
+from telegram.ext import Application, MessageHandler, CallbackQueryHandler, ContextTypes, filters
 
 from .handlers.menu_handlers import MenuHandlers
 from .handlers.trading_handlers import TradingHandlers
@@ -14,42 +20,199 @@ from .handlers.optimization_handlers import OptimizationHandlers
 from .handlers.monitoring_handlers import MonitoringHandlers
 from .handlers.backtesting_handlers import BacktestingHandlers
 from .handlers.dashboard_handlers import DashboardHandlers
+from ..utils.async_cache import async_ttl_cache
+from ..utils.edit_cache import EditCache
 
 logger = logging.getLogger(__name__)
 
+# Las notificaciones se agrupan y se envían como mucho una vez por intervalo
+_NOTIFY_FLUSH_INTERVAL = 1.5
+_TELEGRAM_MAX_LEN = 4096
+
+# Marca de fin de la cola de notificaciones y espera máxima para vaciarla al apagar
+_NOTIFY_STOP = object()
+_NOTIFY_DRAIN_TIMEOUT = 10.0
+
+# Máximo de mensajes de estado recordados para omitir refrescos sin cambios
+_LAST_STATUS_MAX = 1000
+
+# Segundos que Telegram retiene cada getUpdates (PTB suma este valor al read_timeout)
+_POLL_TIMEOUT = 30
+
+# Teclados estáticos de los botones de trading automático
+_KB_AFTER_START = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📊 Ver Estado Trading", callback_data="auto_trading_status")],
+    [InlineKeyboardButton("⏹️ Detener Trading", callback_data="stop_auto_trading")],
+    [InlineKeyboardButton("🔙 Volver al Menú Principal", callback_data="back_to_main")]
+])
+_KB_AFTER_STOP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🚀 Reiniciar Trading", callback_data="start_auto_trading")],
+    [InlineKeyboardButton("📊 Ver Estado", callback_data="auto_trading_status")],
+    [InlineKeyboardButton("🔙 Volver al Menú Principal", callback_data="back_to_main")]
+])
+_KB_STATUS_RUNNING = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔄 Actualizar Estado", callback_data="auto_trading_status")],
+    [InlineKeyboardButton("⏹️ Detener Trading", callback_data="stop_auto_trading")],
+    [InlineKeyboardButton("🔙 Volver al Menú Principal", callback_data="back_to_main")]
+])
+_KB_STATUS_STOPPED = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🚀 Iniciar Trading", callback_data="start_auto_trading")],
+    [InlineKeyboardButton("🔄 Actualizar Estado", callback_data="auto_trading_status")],
+    [InlineKeyboardButton("🔙 Volver al Menú Principal", callback_data="back_to_main")]
+])
+
+_CMD_STARTED_TEXT = """🚀 **TRADING AUTOMÁTICO INICIADO**
+
+✅ **Estado**: Activo
+🎯 **Configuración**: Optimizada para rentabilidad
+📊 **Análisis**: Cada 15 segundos
+💰 **Riesgo**: 2-5% por trade
+🏆 **Posiciones máx**: 5 simultáneas
+📈 **Confianza mín**: 75%
+
+💡 **Comandos disponibles**:
+/stop_trading - Detener trading
+/trading_status - Ver estado actual"""
+
+_CMD_STOPPED_TEXT = """⏹️ **TRADING AUTOMÁTICO DETENIDO**
+
+✅ **Estado**: Inactivo
+📊 **Posiciones**: Mantenidas (no cerradas automáticamente)
+💰 **Balance**: Preservado
+
+💡 **Para reanudar**: /start_trading"""
+
+_BTN_STARTED_TEXT = """🚀 **TRADING AUTOMÁTICO INICIADO**
+
+✅ **Estado**: Activo
+🎯 **Configuración**: Optimizada
+📊 **Análisis**: Cada 15 segundos
+💰 **Riesgo**: 2-5% por trade
+🏆 **Posiciones máx**: 5 simultáneas
+
+💡 **El bot está trabajando en segundo plano**
+Puedes usar otros menús mientras busca operaciones."""
+
+_BTN_STOPPED_TEXT = """⏹️ **TRADING AUTOMÁTICO DETENIDO**
+
+✅ **Estado**: Inactivo
+📊 **Posiciones**: Mantenidas
+💰 **Balance**: Preservado
+
+💡 **El bot ya no busca nuevas operaciones**
+Las posiciones abiertas se mantienen activas."""
+
+_STATUS_CMD_TMPL = """📊 **ESTADO DEL TRADING**
+
+{status_icon} **Estado**: {status_text}
+
+💰 **Información Financiera**:
+• Balance: ${balance:,.2f}
+• Equity: ${equity:,.2f}
+• P&L del día: ${daily_pnl:+.2f}
+• Retorno diario: {daily_return:+.2f}%
+• P&L no realizado: ${unrealized_pnl:+.2f}
+
+🏆 **Posiciones**: {positions_count}
+📊 **Trades hoy**: {trades_today}
+
+⚙️ **Configuración**:
+• Riesgo por trade: 2-5%
+• Posiciones máx: 5
+• Confianza mín: 75%
+• Análisis: Cada 15s"""
+
+_STATUS_BTN_TMPL = """📊 **ESTADO TRADING AUTOMÁTICO**
+
+{status_icon} **Estado**: {status_text}
+
+💰 **Financiero**:
+• Balance: ${balance:,.2f}
+• Equity: ${equity:,.2f}
+• P&L día: ${daily_pnl:+.2f}
+• Retorno: {daily_return:+.2f}%
+• P&L no realizado: ${unrealized_pnl:+.2f}
+
+🏆 **Posiciones**: {positions_count}
+📊 **Trades hoy**: {trades_today}"""
+
+_STATUS_UPDATED_TMPL = "\n\n🕐 **Actualizado**: {timestamp}"
+
+_UM_UNAVAILABLE_TEXT = "❌ Ultimate Machine no disponible"
+
+@async_ttl_cache(2.0, tag='balance')
+async def _cached_account_snapshot(mt5):
+    """Cuenta y posiciones de MT5 compartidas por los refrescos seguidos de estado"""
+    account_info, positions = await asyncio.gather(
+        mt5.get_account_info(),
+        mt5.get_positions(),
+        return_exceptions=True
+    )
+    
+    # Sin cuenta no hay estado que mostrar; sin posiciones se muestra el resto
+    if isinstance(account_info, Exception):
+        raise account_info
+    if isinstance(positions, Exception):
+        logger.warning(f"No se pudieron obtener las posiciones: {positions}")
+        positions = []
+    return account_info, positions
+
+def _unrealized_pnl(account_info, positions):
+    """P&L flotante: el campo 'profit' de la cuenta si existe, si no la suma de las posiciones"""
+    profit = account_info.get('profit')
+    if profit is not None:
+        return profit
+    return math.fsum([pos.get('profit', 0.0) for pos in positions]) if positions else 0
+
 class ForexTradingBot:
     def __init__(self, trading_engine):
-        import logging
-        logger = logging.getLogger(__name__)
-        
-        logger.info(f"🔍 [DEBUG] ForexTradingBot.__init__ called with trading_engine: {type(trading_engine)}")
-        logger.info(f"🔍 [DEBUG] Trading engine has get_status: {hasattr(trading_engine, 'get_status')}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("ForexTradingBot.__init__ con trading_engine: %s", type(trading_engine))
+            logger.debug("Trading engine tiene get_status: %s", hasattr(trading_engine, 'get_status'))
         
         self.trading_engine = trading_engine
         self.token = os.getenv('TELEGRAM_BOT_TOKEN')
         self.chat_id = os.getenv('TELEGRAM_CHAT_ID')
         self.app = None
+        self.ultimate_machine = None  # Asignado desde main.py
+        self._status_edits = EditCache(_LAST_STATUS_MAX)
+        self._trading_tasks = set()  # Referencias fuertes: el loop solo guarda referencias débiles
+        self._notify_queue = asyncio.Queue()
+        self._notify_task = None
+        self._notify_closing = False
         
         # Inicializar handlers
-        logger.info("🔍 [DEBUG] Inicializando handlers...")
+        logger.debug("Inicializando handlers...")
         self.menu_handler = MenuHandlers(trading_engine)
         self.trading_handler = TradingHandlers(trading_engine)
-        logger.info(f"🔍 [DEBUG] TradingHandlers creado con engine: {type(self.trading_handler.trading_engine)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("TradingHandlers creado con engine: %s", type(self.trading_handler.trading_engine))
         self.optimization_handler = OptimizationHandlers(trading_engine)
         self.monitoring_handler = MonitoringHandlers(trading_engine)
         self.backtesting_handler = BacktestingHandlers(trading_engine)
         self.dashboard_handler = DashboardHandlers(trading_engine)
         
+        # Tablas de enrutado de callbacks: búsqueda exacta y, si falla, por prefijo
+        self._routes = self._build_routes()
+        self._prefix_routes = (
+            ("opt_", self.optimization_handler.handle_optimization),
+        )
+        self._commands = {
+            "start": self.start_command,
+            "start_trading": self.start_trading_command,
+            "stop_trading": self.stop_trading_command,
+            "trading_status": self.trading_status_command,
+        }
+        
     async def start(self):
         """Iniciar el bot de Telegram"""
         self.app = Application.builder().token(self.token).build()
         
-        # Handlers
-        self.app.add_handler(CommandHandler("start", self.start_command))
-        self.app.add_handler(CommandHandler("start_trading", self.start_trading_command))
-        self.app.add_handler(CommandHandler("stop_trading", self.stop_trading_command))
-        self.app.add_handler(CommandHandler("trading_status", self.trading_status_command))
-        self.app.add_handler(CallbackQueryHandler(self.button_handler))
+        # Handlers: un solo handler para todos los comandos y otro para los botones
+        self.app.add_handlers([
+            MessageHandler(filters.COMMAND, self._command_dispatch),
+            CallbackQueryHandler(self.button_handler)
+        ])
         
         # Error handler para timeouts
         self.app.add_error_handler(self.error_handler)
@@ -57,22 +220,26 @@ class ForexTradingBot:
         # Iniciar polling
         await self.app.initialize()
         await self.app.start()
-        await self.app.updater.start_polling()
+        # Long polling y solo los tipos de update que el bot maneja (comandos y botones)
+        await self.app.updater.start_polling(
+            timeout=_POLL_TIMEOUT,
+            allowed_updates=[Update.MESSAGE, Update.CALLBACK_QUERY]
+        )
+        self._notify_task = asyncio.create_task(self._flush_notifications())
         
         # Mantener el bot corriendo
         try:
-            import signal
-            import asyncio
-            
             # Crear evento para mantener el bot corriendo
             stop_event = asyncio.Event()
             
-            def signal_handler():
-                stop_event.set()
-            
-            # Configurar manejadores de señales
+            # Configurar manejadores de señales dentro del loop
+            loop = asyncio.get_running_loop()
             for sig in (signal.SIGTERM, signal.SIGINT):
-                signal.signal(sig, lambda s, f: signal_handler())
+                try:
+                    loop.add_signal_handler(sig, stop_event.set)
+                except NotImplementedError:
+                    # Windows no soporta add_signal_handler: despertar al loop desde el handler
+                    signal.signal(sig, lambda s, f: loop.call_soon_threadsafe(stop_event.set))
             
             # Esperar hasta que se reciba una señal de parada
             await stop_event.wait()
@@ -80,43 +247,108 @@ class ForexTradingBot:
         except Exception as e:
             logger.error(f"Error en el bucle principal: {e}")
         finally:
+            await self._stop_notifications()
             await self.app.updater.stop()
             await self.app.stop()
             await self.app.shutdown()
     
+    def _start_trading_task(self, um):
+        """Lanzar el bucle de trading en segundo plano conservando la tarea"""
+        task = asyncio.create_task(um.start_integrated_trading())
+        self._trading_tasks.add(task)
+        task.add_done_callback(self._trading_tasks.discard)
+    
+    async def _command_dispatch(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Enrutar comandos (/comando o /comando@bot) con la tabla de comandos"""
+        command, _, bot_username = update.message.text.split(maxsplit=1)[0][1:].partition('@')
+        
+        # En grupos, /comando@OtroBot va dirigido a otro bot: ignorarlo
+        if bot_username and bot_username.lower() != (context.bot.username or '').lower():
+            return
+        
+        handler = self._commands.get(command.lower())
+        if handler is not None:
+            await handler(update, context)
+    
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Comando /start"""
         await self.menu_handler.show_welcome_message(update)
     
+    async def _reply(self, target, text, markup=None):
+        """Editar (botón) o responder (comando) con Markdown y sin vista previa de enlaces"""
+        send = target.edit_message_text if isinstance(target, CallbackQuery) else target.reply_text
+        return await send(
+            text,
+            reply_markup=markup,
+            parse_mode=ParseMode.MARKDOWN,
+            disable_web_page_preview=True
+        )
+    
+    async def _build_start_trading_response(self, button: bool):
+        """Iniciar el trading si está parado y devolver (texto, teclado) para comando o botón"""
+        um = self.ultimate_machine
+        if um is None:
+            return _UM_UNAVAILABLE_TEXT, None
+        if um.running:
+            return "⚠️ El trading automático ya está activo", None
+        
+        self._start_trading_task(um)
+        if button:
+            logger.info("🚀 Trading automático iniciado por botón")
+            return _BTN_STARTED_TEXT, _KB_AFTER_START
+        logger.info("🚀 Trading automático iniciado por comando de Telegram")
+        return _CMD_STARTED_TEXT, None
+    
+    async def _build_stop_trading_response(self, button: bool):
+        """Detener el trading si está activo y devolver (texto, teclado) para comando o botón"""
+        um = self.ultimate_machine
+        if um is None:
+            return _UM_UNAVAILABLE_TEXT, None
+        if not um.running:
+            return "⚠️ El trading automático ya está inactivo", None
+        
+        await um.stop_integrated_trading()
+        if button:
+            logger.info("⏹️ Trading automático detenido por botón")
+            return _BTN_STOPPED_TEXT, _KB_AFTER_STOP
+        logger.info("⏹️ Trading automático detenido por comando de Telegram")
+        return _CMD_STOPPED_TEXT, None
+    
+    async def _build_status_response(self, button: bool):
+        """Devolver (texto, teclado) con el estado del trading; sin teclado si no hay datos"""
+        um = self.ultimate_machine
+        if um is None:
+            return _UM_UNAVAILABLE_TEXT, None
+        
+        account_info, positions = await _cached_account_snapshot(um.mt5)
+        if not account_info:
+            return ("❌ No se pudo obtener información" if button
+                    else "❌ No se pudo obtener información de la cuenta"), None
+        
+        balance = account_info.get('balance', 0)
+        daily_pnl = balance - um.initial_balance if um.initial_balance > 0 else 0
+        template, markup = (
+            (_STATUS_BTN_TMPL, _KB_STATUS_RUNNING if um.running else _KB_STATUS_STOPPED) if button
+            else (_STATUS_CMD_TMPL, None)
+        )
+        text = template.format(
+            status_icon="🟢" if um.running else "🔴",
+            status_text="ACTIVO" if um.running else "INACTIVO",
+            balance=balance,
+            equity=account_info.get('equity', 0),
+            daily_pnl=daily_pnl,
+            daily_return=(daily_pnl / um.initial_balance * 100) if um.initial_balance > 0 else 0,
+            unrealized_pnl=_unrealized_pnl(account_info, positions),
+            positions_count=len(positions) if positions else 0,
+            trades_today=um.daily_stats['trades']
+        )
+        return text, markup
+    
     async def start_trading_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Comando /start_trading - Iniciar trading automático"""
         try:
-            if hasattr(self, 'ultimate_machine') and self.ultimate_machine:
-                if not self.ultimate_machine.running:
-                    # Iniciar trading automático
-                    import asyncio
-                    asyncio.create_task(self.ultimate_machine.start_integrated_trading())
-                    
-                    message = """🚀 **TRADING AUTOMÁTICO INICIADO**
-
-✅ **Estado**: Activo
-🎯 **Configuración**: Optimizada para rentabilidad
-📊 **Análisis**: Cada 15 segundos
-💰 **Riesgo**: 2-5% por trade
-🏆 **Posiciones máx**: 5 simultáneas
-📈 **Confianza mín**: 75%
-
-💡 **Comandos disponibles**:
-/stop_trading - Detener trading
-/trading_status - Ver estado actual"""
-                    
-                    await update.message.reply_text(message, parse_mode='Markdown')
-                    logger.info("🚀 Trading automático iniciado por comando de Telegram")
-                else:
-                    await update.message.reply_text("⚠️ El trading automático ya está activo")
-            else:
-                await update.message.reply_text("❌ Ultimate Machine no disponible")
-                
+            text, markup = await self._build_start_trading_response(button=False)
+            await self._reply(update.message, text, markup)
         except Exception as e:
             logger.error(f"Error iniciando trading: {e}")
             await update.message.reply_text(f"❌ Error iniciando trading: {str(e)}")
@@ -124,25 +356,8 @@ class ForexTradingBot:
     async def stop_trading_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Comando /stop_trading - Detener trading automático"""
         try:
-            if hasattr(self, 'ultimate_machine') and self.ultimate_machine:
-                if self.ultimate_machine.running:
-                    await self.ultimate_machine.stop_integrated_trading()
-                    
-                    message = """⏹️ **TRADING AUTOMÁTICO DETENIDO**
-
-✅ **Estado**: Inactivo
-📊 **Posiciones**: Mantenidas (no cerradas automáticamente)
-💰 **Balance**: Preservado
-
-💡 **Para reanudar**: /start_trading"""
-                    
-                    await update.message.reply_text(message, parse_mode='Markdown')
-                    logger.info("⏹️ Trading automático detenido por comando de Telegram")
-                else:
-                    await update.message.reply_text("⚠️ El trading automático ya está inactivo")
-            else:
-                await update.message.reply_text("❌ Ultimate Machine no disponible")
-                
+            text, markup = await self._build_stop_trading_response(button=False)
+            await self._reply(update.message, text, markup)
         except Exception as e:
             logger.error(f"Error deteniendo trading: {e}")
             await update.message.reply_text(f"❌ Error deteniendo trading: {str(e)}")
@@ -150,100 +365,98 @@ class ForexTradingBot:
     async def trading_status_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Comando /trading_status - Ver estado del trading"""
         try:
-            if hasattr(self, 'ultimate_machine') and self.ultimate_machine:
-                # Obtener información de cuenta
-                account_info = await self.ultimate_machine.mt5.get_account_info()
-                positions = await self.ultimate_machine.mt5.get_positions()
-                
-                if account_info:
-                    balance = account_info.get('balance', 0)
-                    equity = account_info.get('equity', 0)
-                    daily_pnl = balance - self.ultimate_machine.initial_balance if self.ultimate_machine.initial_balance > 0 else 0
-                    daily_return = (daily_pnl / self.ultimate_machine.initial_balance * 100) if self.ultimate_machine.initial_balance > 0 else 0
-                    unrealized_pnl = sum(pos.get('profit', 0) for pos in positions) if positions else 0
-                    
-                    status_icon = "🟢" if self.ultimate_machine.running else "🔴"
-                    status_text = "ACTIVO" if self.ultimate_machine.running else "INACTIVO"
-                    
-                    message = f"""📊 **ESTADO DEL TRADING**
-
-{status_icon} **Estado**: {status_text}
-
-💰 **Información Financiera**:
-• Balance: ${balance:,.2f}
-• Equity: ${equity:,.2f}
-• P&L del día: ${daily_pnl:+.2f}
-• Retorno diario: {daily_return:+.2f}%
-• P&L no realizado: ${unrealized_pnl:+.2f}
-
-🏆 **Posiciones**: {len(positions) if positions else 0}
-📊 **Trades hoy**: {self.ultimate_machine.daily_stats['trades']}
-
-⚙️ **Configuración**:
-• Riesgo por trade: 2-5%
-• Posiciones máx: 5
-• Confianza mín: 75%
-• Análisis: Cada 15s"""
-                    
-                    await update.message.reply_text(message, parse_mode='Markdown')
-                else:
-                    await update.message.reply_text("❌ No se pudo obtener información de la cuenta")
-            else:
-                await update.message.reply_text("❌ Ultimate Machine no disponible")
-                
+            text, markup = await self._build_status_response(button=False)
+            await self._reply(update.message, text, markup)
         except Exception as e:
             logger.error(f"Error obteniendo estado: {e}")
             await update.message.reply_text(f"❌ Error obteniendo estado: {str(e)}")
     
     async def send_notification(self, message: str):
-        """Enviar notificación al usuario"""
+        """Encolar notificación para el usuario (se envía agrupada)"""
+        await self._notify_queue.put(message)
+    
+    def _take_batch(self, first):
+        """Agrupar first con lo que ya esté en cola sin pasar del límite de Telegram; devuelve (lote, siguiente)"""
+        batch = [first]
+        size = len(first)
+        while not self._notify_queue.empty():
+            message = self._notify_queue.get_nowait()
+            if message is _NOTIFY_STOP or size + 2 + len(message) > _TELEGRAM_MAX_LEN:
+                return batch, message
+            batch.append(message)
+            size += 2 + len(message)
+        return batch, None
+    
+    async def _send_notification_text(self, text: str, markdown: bool = True):
+        """Enviar un texto al chat del usuario"""
+        await self.app.bot.send_message(
+            chat_id=self.chat_id,
+            text=text,
+            parse_mode=ParseMode.MARKDOWN if markdown else None,
+            disable_web_page_preview=True
+        )
+    
+    async def _send_batch(self, batch):
+        """Enviar un lote de notificaciones; si falla, enviarlas una a una (y en texto plano si hace falta)"""
+        if not (self.app and self.chat_id):
+            logger.warning("⚠️ No se pudo enviar notificación - App o Chat ID no disponible")
+            return
+        
+        try:
+            await self._send_notification_text("\n\n".join(batch))
+            logger.info("📨 %d notificación(es) enviada(s) al usuario", len(batch))
+            return
+        except Exception as e:
+            logger.error("Error enviando notificaciones agrupadas: %s", e)
+        
+        # Un mensaje con Markdown mal formado no debe arrastrar al resto del lote
+        for message in batch:
+            try:
+                if len(batch) > 1:
+                    try:
+                        await self._send_notification_text(message)
+                        continue
+                    except Exception:
+                        pass
+                await self._send_notification_text(message, markdown=False)
+            except Exception as e:
+                logger.error("Error enviando notificación: %s", e)
+    
+    async def _flush_notifications(self):
+        """Enviar las notificaciones encoladas agrupando las que lleguen juntas"""
+        pending = None
+        while True:
+            first = pending if pending is not None else await self._notify_queue.get()
+            if first is _NOTIFY_STOP:
+                return
+            
+            batch, pending = self._take_batch(first)
+            await self._send_batch(batch)
+            
+            # Al apagar se vacía la cola sin esperar entre envíos
+            if not self._notify_closing:
+                await asyncio.sleep(_NOTIFY_FLUSH_INTERVAL)
+    
+    async def _stop_notifications(self):
+        """Enviar lo que quede en cola (avisos de parada incluidos) y detener el envío"""
+        if self._notify_task is None:
+            return
+        
+        # La marca de fin va detrás de todo lo encolado: se envía todo antes de terminar
+        self._notify_closing = True
+        self._notify_queue.put_nowait(_NOTIFY_STOP)
         try:
-            if self.app and self.chat_id:
-                await self.app.bot.send_message(
-                    chat_id=self.chat_id,
-                    text=message,
-                    parse_mode='Markdown'
-                )
-                logger.info("📨 Notificación enviada al usuario")
-            else:
-                logger.warning("⚠️ No se pudo enviar notificación - App o Chat ID no disponible")
+            await asyncio.wait_for(self._notify_task, timeout=_NOTIFY_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("⚠️ Notificaciones pendientes descartadas al apagar el bot")
         except Exception as e:
-            logger.error(f"Error enviando notificación: {e}")
+            logger.error("Error vaciando notificaciones: %s", e)
     
     async def handle_start_auto_trading(self, query):
         """Manejar botón de iniciar trading automático"""
         try:
-            if hasattr(self, 'ultimate_machine') and self.ultimate_machine:
-                if not self.ultimate_machine.running:
-                    import asyncio
-                    asyncio.create_task(self.ultimate_machine.start_integrated_trading())
-                    
-                    message = """🚀 **TRADING AUTOMÁTICO INICIADO**
-
-✅ **Estado**: Activo
-🎯 **Configuración**: Optimizada
-📊 **Análisis**: Cada 15 segundos
-💰 **Riesgo**: 2-5% por trade
-🏆 **Posiciones máx**: 5 simultáneas
-
-💡 **El bot está trabajando en segundo plano**
-Puedes usar otros menús mientras busca operaciones."""
-                    
-                    # Crear botón para volver al menú
-                    from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-                    keyboard = [
-                        [InlineKeyboardButton("📊 Ver Estado Trading", callback_data="auto_trading_status")],
-                        [InlineKeyboardButton("⏹️ Detener Trading", callback_data="stop_auto_trading")],
-                        [InlineKeyboardButton("🔙 Volver al Menú Principal", callback_data="back_to_main")]
-                    ]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-                    
-                    await query.edit_message_text(message, reply_markup=reply_markup, parse_mode='Markdown')
-                    logger.info("🚀 Trading automático iniciado por botón")
-                else:
-                    await query.edit_message_text("⚠️ El trading automático ya está activo")
-            else:
-                await query.edit_message_text("❌ Ultimate Machine no disponible")
+            text, markup = await self._build_start_trading_response(button=True)
+            await self._reply(query, text, markup)
         except Exception as e:
             logger.error(f"Error iniciando trading: {e}")
             await query.edit_message_text(f"❌ Error: {str(e)}")
@@ -251,34 +464,8 @@ Puedes usar otros menús mientras busca operaciones."""
     async def handle_stop_auto_trading(self, query):
         """Manejar botón de detener trading automático"""
         try:
-            if hasattr(self, 'ultimate_machine') and self.ultimate_machine:
-                if self.ultimate_machine.running:
-                    await self.ultimate_machine.stop_integrated_trading()
-                    
-                    message = """⏹️ **TRADING AUTOMÁTICO DETENIDO**
-
-✅ **Estado**: Inactivo
-📊 **Posiciones**: Mantenidas
-💰 **Balance**: Preservado
-
-💡 **El bot ya no busca nuevas operaciones**
-Las posiciones abiertas se mantienen activas."""
-                    
-                    # Crear botones de navegación
-                    from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-                    keyboard = [
-                        [InlineKeyboardButton("🚀 Reiniciar Trading", callback_data="start_auto_trading")],
-                        [InlineKeyboardButton("📊 Ver Estado", callback_data="auto_trading_status")],
-                        [InlineKeyboardButton("🔙 Volver al Menú Principal", callback_data="back_to_main")]
-                    ]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-                    
-                    await query.edit_message_text(message, reply_markup=reply_markup, parse_mode='Markdown')
-                    logger.info("⏹️ Trading automático detenido por botón")
-                else:
-                    await query.edit_message_text("⚠️ El trading automático ya está inactivo")
-            else:
-                await query.edit_message_text("❌ Ultimate Machine no disponible")
+            text, markup = await self._build_stop_trading_response(button=True)
+            await self._reply(query, text, markup)
         except Exception as e:
             logger.error(f"Error deteniendo trading: {e}")
             await query.edit_message_text(f"❌ Error: {str(e)}")
@@ -286,69 +473,20 @@ Las posiciones abiertas se mantienen activas."""
     async def handle_auto_trading_status(self, query):
         """Manejar botón de estado del trading automático"""
         try:
-            if hasattr(self, 'ultimate_machine') and self.ultimate_machine:
-                account_info = await self.ultimate_machine.mt5.get_account_info()
-                positions = await self.ultimate_machine.mt5.get_positions()
-                
-                if account_info:
-                    balance = account_info.get('balance', 0)
-                    equity = account_info.get('equity', 0)
-                    daily_pnl = balance - self.ultimate_machine.initial_balance if self.ultimate_machine.initial_balance > 0 else 0
-                    daily_return = (daily_pnl / self.ultimate_machine.initial_balance * 100) if self.ultimate_machine.initial_balance > 0 else 0
-                    unrealized_pnl = sum(pos.get('profit', 0) for pos in positions) if positions else 0
-                    
-                    status_icon = "🟢" if self.ultimate_machine.running else "🔴"
-                    status_text = "ACTIVO" if self.ultimate_machine.running else "INACTIVO"
-                    
-                    # Agregar timestamp para forzar actualización
-                    from datetime import datetime
-                    timestamp = datetime.now().strftime("%H:%M:%S")
-                    
-                    message = f"""📊 **ESTADO TRADING AUTOMÁTICO**
-
-{status_icon} **Estado**: {status_text}
-
-💰 **Financiero**:
-• Balance: ${balance:,.2f}
-• Equity: ${equity:,.2f}
-• P&L día: ${daily_pnl:+.2f}
-• Retorno: {daily_return:+.2f}%
-• P&L no realizado: ${unrealized_pnl:+.2f}
-
-🏆 **Posiciones**: {len(positions) if positions else 0}
-📊 **Trades hoy**: {self.ultimate_machine.daily_stats['trades']}
-
-🕐 **Actualizado**: {timestamp}"""
-                    
-                    # Crear botones según el estado
-                    from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-                    if self.ultimate_machine.running:
-                        keyboard = [
-                            [InlineKeyboardButton("🔄 Actualizar Estado", callback_data="auto_trading_status")],
-                            [InlineKeyboardButton("⏹️ Detener Trading", callback_data="stop_auto_trading")],
-                            [InlineKeyboardButton("🔙 Volver al Menú Principal", callback_data="back_to_main")]
-                        ]
-                    else:
-                        keyboard = [
-                            [InlineKeyboardButton("🚀 Iniciar Trading", callback_data="start_auto_trading")],
-                            [InlineKeyboardButton("🔄 Actualizar Estado", callback_data="auto_trading_status")],
-                            [InlineKeyboardButton("🔙 Volver al Menú Principal", callback_data="back_to_main")]
-                        ]
-                    
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-                    
-                    try:
-                        await query.edit_message_text(message, reply_markup=reply_markup, parse_mode='Markdown')
-                    except Exception as edit_error:
-                        # Si falla la edición, enviar mensaje nuevo
-                        if "Message is not modified" in str(edit_error):
-                            await query.message.reply_text(message, reply_markup=reply_markup, parse_mode='Markdown')
-                        else:
-                            raise edit_error
-                else:
-                    await query.edit_message_text("❌ No se pudo obtener información")
-            else:
-                await query.edit_message_text("❌ Ultimate Machine no disponible")
+            text, markup = await self._build_status_response(button=True)
+            if markup is None:
+                await self._reply(query, text)
+                return
+            
+            # Si las cifras no cambiaron y el mensaje sigue mostrando este estado, no reenviar
+            if self._status_edits.unchanged(query.message, text, markup):
+                logger.debug("Estado sin cambios: se omite la edición")
+                return
+            
+            # Agregar timestamp para forzar actualización
+            stamped = text + _STATUS_UPDATED_TMPL.format(timestamp=datetime.now().strftime("%H:%M:%S"))
+            result = await self._reply(query, stamped, markup)
+            self._status_edits.remember(query.message, text, markup, result)
         except Exception as e:
             logger.error(f"Error obteniendo estado: {e}")
             await query.edit_message_text(f"❌ Error: {str(e)}")
@@ -359,98 +497,86 @@ Las posiciones abiertas se mantienen activas."""
         await query.answer()
         
         data = query.data
-        logger.info(f"🔍 [DEBUG] Button pressed: {data}")
+        logger.debug("Botón pulsado: %s", data)
         
         # === ROUTING DE HANDLERS ===
+        handler = self._routes.get(data)
+        if handler is not None:
+            await handler(query)
+            return
         
-        # Trading handlers
-        if data == "balance":
-            await self.trading_handler.show_balance(query)
-        elif data == "analysis":
-            await self.trading_handler.show_analysis(query)
-        elif data == "mtf_analysis":
-            await self.trading_handler.show_mtf_analysis(query)
-        elif data == "positions":
-            await self.trading_handler.show_positions(query)
-        elif data == "start_trading":
-            await self.trading_handler.start_trading(query)
-        elif data == "stop_trading":
-            await self.trading_handler.stop_trading(query)
-        elif data == "close_all":
-            await self.trading_handler.close_all_positions(query)
-        
-        # Ultimate Money Machine handlers
-        elif data == "start_auto_trading":
-            await self.handle_start_auto_trading(query)
-        elif data == "stop_auto_trading":
-            await self.handle_stop_auto_trading(query)
-        elif data == "auto_trading_status":
-            await self.handle_auto_trading_status(query)
-        elif data == "back_to_main":
-            await self.menu_handler.show_main_menu(query)
-        
-        # Optimization handlers
-        elif data == "optimize":
-            await self.optimization_handler.show_optimize_menu(query)
-        elif data == "settings":
-            await self.optimization_handler.show_settings(query)
-        elif data.startswith("opt_"):
-            await self.optimization_handler.handle_optimization(query, data)
-        
-        # Monitoring handlers
-        elif data == "performance":
-            await self.monitoring_handler.show_performance_monitor(query)
-        elif data == "test_connections":
-            await self.monitoring_handler.run_connection_tests(query)
-        elif data == "history":
-            await self.monitoring_handler.show_history(query)
-        elif data == "help":
-            await self.monitoring_handler.show_help(query)
+        for prefix, prefix_handler in self._prefix_routes:
+            if data.startswith(prefix):
+                await prefix_handler(query, data)
+                return
         
-        # Dashboard handlers
-        elif data == "dashboard_main":
-            await self.dashboard_handler.show_performance_dashboard(query)
-        elif data == "dashboard_daily":
-            await self.dashboard_handler.show_daily_performance(query)
-        elif data == "dashboard_weekly":
-            await self.dashboard_handler.show_weekly_performance(query)
-        elif data == "dashboard_strategy":
-            await self.dashboard_handler.show_strategy_performance(query)
-        elif data == "dashboard_pairs":
-            await self.dashboard_handler.show_pairs_performance(query)
-        elif data == "dashboard_drawdown":
-            await self.dashboard_handler.show_drawdown_analysis(query)
-        elif data == "dashboard_realtime":
-            await self.dashboard_handler.show_realtime_metrics(query)
-        elif data == "drawdown_chart":
-            await query.edit_message_text("📊 Gráfico de Drawdown - Función avanzada en desarrollo")
-        elif data == "realtime_autorefresh":
-            await query.edit_message_text("📡 Auto-refresh activado - Función en desarrollo")
-        elif data == "positions_detail":
-            await query.edit_message_text("🎯 Detalle de posiciones - Redirigiendo a balance...")
+        # Handler no encontrado
+        await self._reply(query, "❌ Función no implementada aún.")
+    
+    async def _show_main_menu(self, query):
+        """Volver al menú principal precargando los datos del dashboard"""
+        self.trading_handler.prefetch_dashboard()
+        await self.menu_handler.show_main_menu(query)
+    
+    def _build_routes(self):
+        """Construir la tabla callback_data -> handler (una sola vez)"""
+        trading = self.trading_handler
+        optimization = self.optimization_handler
+        monitoring = self.monitoring_handler
+        dashboard = self.dashboard_handler
         
-        # Menu navigation
-        elif data == "back_to_menu":
-            await self.menu_handler.show_main_menu(query)
+        def placeholder(text):
+            return lambda query: query.edit_message_text(text)
         
-        else:
-            # Handler no encontrado
-            await query.edit_message_text(
-                "❌ Función no implementada aún.",
-                parse_mode='Markdown'
-            )
+        return {
+            # Trading handlers
+            "balance": trading.show_balance,
+            "analysis": trading.show_analysis,
+            "mtf_analysis": trading.show_mtf_analysis,
+            "positions": trading.show_positions,
+            "start_trading": trading.start_trading,
+            "stop_trading": trading.stop_trading,
+            "close_all": trading.close_all_positions,
+            
+            # Ultimate Money Machine handlers
+            "start_auto_trading": self.handle_start_auto_trading,
+            "stop_auto_trading": self.handle_stop_auto_trading,
+            "auto_trading_status": self.handle_auto_trading_status,
+            "back_to_main": self._show_main_menu,
+            
+            # Optimization handlers
+            "optimize": optimization.show_optimize_menu,
+            "settings": optimization.show_settings,
+            
+            # Monitoring handlers
+            "performance": monitoring.show_performance_monitor,
+            "test_connections": monitoring.run_connection_tests,
+            "history": monitoring.show_history,
+            "help": monitoring.show_help,
+            
+            # Dashboard handlers
+            "dashboard_main": dashboard.show_performance_dashboard,
+            "dashboard_daily": dashboard.show_daily_performance,
+            "dashboard_weekly": dashboard.show_weekly_performance,
+            "dashboard_strategy": dashboard.show_strategy_performance,
+            "dashboard_pairs": dashboard.show_pairs_performance,
+            "dashboard_drawdown": dashboard.show_drawdown_analysis,
+            "dashboard_realtime": dashboard.show_realtime_metrics,
+            "drawdown_chart": placeholder("📊 Gráfico de Drawdown - Función avanzada en desarrollo"),
+            "realtime_autorefresh": placeholder("📡 Auto-refresh activado - Función en desarrollo"),
+            "positions_detail": placeholder("🎯 Detalle de posiciones - Redirigiendo a balance..."),
+            
+            # Menu navigation
+            "back_to_menu": self._show_main_menu,
+        }
     
     async def error_handler(self, update, context):
         """Manejar errores de Telegram (timeouts, etc.)"""
-        import telegram
-        
-        # Solo logear errores importantes, ignorar timeouts comunes
-        if isinstance(context.error, telegram.error.TimedOut):
+        # Solo logear errores importantes, ignorar timeouts comunes (TimedOut hereda de NetworkError)
+        err = context.error
+        if isinstance(err, TimedOut):
             logger.debug("Timeout de Telegram (normal) - ignorando")
-            return
-        elif isinstance(context.error, telegram.error.NetworkError):
-            logger.warning(f"Error de red de Telegram: {context.error}")
-            return
+        elif isinstance(err, NetworkError):
+            logger.warning("Error de red de Telegram: %s", err)
         else:
-            logger.error(f"Error no manejado en Telegram: {context.error}")
-            # Para otros errores, logear más detalles si es necesario
+            logger.error("Error no manejado en Telegram: %s", err)
@@ -3,39 +3,120 @@ Sistema de Machine Learning Adaptativo
 El bot aprende de sus propios trades y se optimiza automáticamente
 """
 
+import atexit
+import copy
 import json
 import os
 import logging
+import threading
 import numpy as np
-import pandas as pd
+from array import array
+from types import MappingProxyType
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
-from collections import defaultdict, deque
+from collections import Counter, defaultdict, deque
+from collections.abc import Mapping
+
+# numba es opcional: sin él las razones se cuentan con Counter
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Serialización y escritura atómica compartidas
+try:
+    from ..utils.persistence import dumps, loads, write_atomic
+except ImportError:
+    # Importaciones absolutas (cuando se ejecuta directamente)
+    from utils.persistence import dumps, loads, write_atomic
 
 logger = logging.getLogger(__name__)
 
+# Trades recordados para aprender
+_TRADE_MEMORY_SIZE = 1000
+
+# Indicadores con peso adaptativo y su posición en el vector de pesos
+_INDICATORS = ('rsi', 'macd', 'bollinger', 'sma_cross', 'ema_cross', 'stochastic', 'atr', 'momentum')
+_INDICATOR_INDEX = {name: i for i, name in enumerate(_INDICATORS)}
+
+# Trades entre ciclos de aprendizaje, y entre ciclos completos (indicadores, sesiones y riesgo)
+_LEARN_EVERY = 10
+_HEAVY_LEARN_EVERY = 50
+
+# Segundos entre volcados del log de trades desde el hilo de escritura
+_LOG_FLUSH_INTERVAL = 1.0
+
+# Trades de la ventana reciente en las estadísticas
+_RECENT_WINDOW = 20
+
+# Sesión por hora UTC: london 8-12, overlap 13-17, new_york 18-22, el resto asian
+_SESSION_BY_HOUR = ('asian',) * 8 + ('london',) * 5 + ('overlap',) * 5 + ('new_york',) * 5 + ('asian',)
+
+# Tramos de confianza (cerrados por la derecha) para buscar la confianza mínima óptima
+_CONFIDENCE_BINS = np.array([0, 70, 75, 80, 85, 90, 100], dtype=np.float64)
+
+# Razones distintas internadas antes de reconstruir el mapa (incluyen valores numéricos)
+_MAX_REASON_IDS = 10 * _TRADE_MEMORY_SIZE
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _tally_reason_ids(reason_ids, offsets, success, n_ids):
+        """Aciertos y fallos por ID de razón; el trade i usa reason_ids[offsets[i]:offsets[i + 1]]"""
+        success_counts = np.zeros(n_ids, np.int64)
+        fail_counts = np.zeros(n_ids, np.int64)
+        for i in range(offsets.size - 1):
+            counts = success_counts if success[i] else fail_counts
+            for j in range(offsets[i], offsets[i + 1]):
+                counts[reason_ids[j]] += 1
+        return success_counts, fail_counts
+
+class _ReadOnlyView(Mapping):
+    """Vista de solo lectura de un dict que también protege los dicts anidados (sin copiarlos)"""
+    
+    __slots__ = ('_data',)
+    
+    def __init__(self, data: Dict):
+        self._data = data
+    
+    def __getitem__(self, key):
+        value = self._data[key]
+        return _ReadOnlyView(value) if isinstance(value, dict) else value
+    
+    def __iter__(self):
+        return iter(self._data)
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def __repr__(self):
+        return f"_ReadOnlyView({self._data!r})"
+
 class AdaptiveLearningSystem:
     def __init__(self):
-        self.learning_data_file = "data/learning_data.json"
-        self.model_file = "data/adaptive_model.json"
+        self.learning_data_file = "data/learning_data.json"  # Formato antiguo, solo se lee para migrar
+        self.trade_log_file = "data/learning_data.jsonl"  # Un trade por línea, solo se añade
+        self.model_file = "data/adaptive_model.json"  # Pesos, parámetros y estadísticas
         
         # Crear directorio si no existe
         os.makedirs("data", exist_ok=True)
         
         # Memoria de trades
-        self.trade_memory = deque(maxlen=1000)  # Últimos 1000 trades
+        self.trade_memory = deque(maxlen=_TRADE_MEMORY_SIZE)  # Últimos 1000 trades
+        self._trade_log_lines = 0  # Líneas del log, para compactarlo cuando crece
+        self._pending_log = []  # Trades aún no escritos en el log
+        self._log_lock = threading.Lock()  # Protege _pending_log y el archivo del log
+        self._writer_stop = threading.Event()
+        self._recent_success_sum = 0  # Aciertos entre los últimos _RECENT_WINDOW trades
+        self._trades_since_heavy = 0  # Trades desde el último ciclo completo
+        self._params_version = 0  # Sube cada vez que cambian pesos o parámetros
+        self._reason_ids = {}  # Razón -> ID entero (solo con numba)
+        self._trade_reason_ids = deque(maxlen=_TRADE_MEMORY_SIZE)  # IDs de razones, paralelo a trade_memory
+        self._cols = self._empty_columns()  # Columnas de trade_memory (sus últimos N valores)
         
-        # Pesos adaptativos para indicadores
-        self.indicator_weights = {
-            'rsi': 1.0,
-            'macd': 1.0,
-            'bollinger': 1.0,
-            'sma_cross': 1.0,
-            'ema_cross': 1.0,
-            'stochastic': 1.0,
-            'atr': 1.0,
-            'momentum': 1.0
-        }
+        # Pesos adaptativos para indicadores, en el orden de _INDICATORS
+        self.weights_vec = np.ones(len(_INDICATORS))
+        self._weights_dict = None  # indicator_weights, reconstruido solo tras cambiar el vector
         
         # Parámetros adaptativos
         self.adaptive_params = {
@@ -62,36 +143,125 @@ class AdaptiveLearningSystem:
         # Cargar datos existentes
         self.load_learning_data()
         
+        # Escribir el log en segundo plano para no esperar al disco al registrar trades
+        self._writer = threading.Thread(target=self._writer_loop, name="adaptive-learning-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self._flush_and_join)
+        
     def load_learning_data(self):
         """Cargar datos de aprendizaje previos"""
         try:
-            if os.path.exists(self.learning_data_file):
+            if os.path.exists(self.trade_log_file):
+                trades = []
+                with open(self.trade_log_file, 'rb') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            trades.append(loads(line))
+                        except ValueError:
+                            # Línea incompleta si el proceso murió a mitad de escritura
+                            logger.warning("Línea inválida en el log de trades, ignorada")
+                self._trade_log_lines = len(trades)
+                self.trade_memory = deque(trades, maxlen=_TRADE_MEMORY_SIZE)
+            
+            if os.path.exists(self.model_file):
+                with open(self.model_file, 'rb') as f:
+                    data = loads(f.read())
+            elif os.path.exists(self.learning_data_file):
+                # Migrar el formato antiguo: trades al log y el resto al próximo snapshot
                 with open(self.learning_data_file, 'r') as f:
                     data = json.load(f)
-                    
-                self.trade_memory = deque(data.get('trades', []), maxlen=1000)
-                self.indicator_weights = data.get('weights', self.indicator_weights)
-                self.adaptive_params = data.get('params', self.adaptive_params)
-                self.learning_stats = data.get('stats', self.learning_stats)
-                
+                if not self.trade_memory:
+                    self.trade_memory = deque(data.get('trades', []), maxlen=_TRADE_MEMORY_SIZE)
+                    self._rewrite_trade_log()
+            else:
+                data = {}
+            
+            self._reintern_reasons()
+            self._cols = self._empty_columns()
+            for trade in self.trade_memory:
+                self._append_columns(trade)
+            self._recent_success_sum = sum(
+                1 for i in range(max(0, len(self.trade_memory) - _RECENT_WINDOW), len(self.trade_memory))
+                if self.trade_memory[i].get('success', False)
+            )
+            
+            self.indicator_weights = data.get('weights', self.indicator_weights)
+            self.adaptive_params = data.get('params', self.adaptive_params)
+            self.learning_stats = data.get('stats', self.learning_stats)
+            self._params_version += 1
+            
+            if self.trade_memory:
                 logger.info(f"Datos de aprendizaje cargados: {len(self.trade_memory)} trades")
                 
         except Exception as e:
             logger.error(f"Error cargando datos de aprendizaje: {e}")
     
-    def save_learning_data(self):
-        """Guardar datos de aprendizaje"""
+    def _intern_reasons(self, reasons) -> np.ndarray:
+        """IDs enteros de las razones de un trade, asignando uno nuevo a cada razón no vista"""
+        ids = self._reason_ids
+        return np.array([ids.setdefault(reason, len(ids)) for reason in reasons or ()], dtype=np.int32)
+    
+    def _reintern_reasons(self):
+        """Reconstruir el mapa de razones con solo las que siguen en memoria"""
+        self._reason_ids = {}
+        self._trade_reason_ids.clear()
+        if NUMBA_AVAILABLE:
+            self._trade_reason_ids.extend(self._intern_reasons(trade.get('reasons')) for trade in self.trade_memory)
+    
+    def _rewrite_trade_log(self):
+        """Reescribir el log de trades con solo los que siguen en memoria"""
+        with self._log_lock:
+            # Los pendientes ya están en trade_memory: no volver a añadirlos
+            self._pending_log.clear()
+            write_atomic(self.trade_log_file, b"".join(dumps(trade) + b"\n" for trade in self.trade_memory))
+            self._trade_log_lines = len(self.trade_memory)
+    
+    def _append_trade_log(self, trade: Dict):
+        """Encolar un trade para que el hilo de escritura lo añada al log"""
+        with self._log_lock:
+            self._pending_log.append(trade)
+    
+    def _flush_trade_log(self):
+        """Añadir al log, en una sola escritura, los trades pendientes"""
+        with self._log_lock:
+            pending, self._pending_log = self._pending_log, []
+            if not pending:
+                return
+            try:
+                with open(self.trade_log_file, 'ab') as f:
+                    f.write(b"".join(dumps(trade) + b"\n" for trade in pending))
+                self._trade_log_lines += len(pending)
+            except Exception as e:
+                logger.error(f"Error escribiendo log de trades: {e}")
+    
+    def _writer_loop(self):
+        """Hilo de escritura: volcar los trades pendientes como mucho una vez por intervalo"""
+        while not self._writer_stop.wait(_LOG_FLUSH_INTERVAL):
+            self._flush_trade_log()
+        self._flush_trade_log()
+    
+    def _flush_and_join(self):
+        """Detener el hilo de escritura tras volcar lo pendiente (al salir del proceso)"""
+        self._writer_stop.set()
+        self._writer.join(timeout=5)
+    
+    def save_learning_data(self, now_iso: Optional[str] = None):
+        """Guardar pesos, parámetros y estadísticas (los trades ya están en el log)"""
         try:
             data = {
-                'trades': list(self.trade_memory),
                 'weights': self.indicator_weights,
                 'params': self.adaptive_params,
                 'stats': self.learning_stats,
-                'last_updated': datetime.now().isoformat()
+                'last_updated': now_iso or datetime.now().isoformat(timespec='seconds')
             }
             
-            with open(self.learning_data_file, 'w') as f:
-                json.dump(data, f, indent=2, default=str)
+            write_atomic(self.model_file, dumps(data))
+            
+            # Compactar el log cuando acumula más del doble de lo que se recuerda
+            if self._trade_log_lines > 2 * _TRADE_MEMORY_SIZE:
+                self._rewrite_trade_log()
                 
             logger.info("Datos de aprendizaje guardados")
             
@@ -101,9 +271,13 @@ class AdaptiveLearningSystem:
     def record_trade(self, trade_data: Dict):
         """Registrar un trade para aprendizaje"""
         try:
+            # Una sola lectura del reloj local y otra del UTC para todo el trade
+            now = datetime.now()
+            utc_hour = datetime.utcnow().hour
+            
             # Enriquecer datos del trade
             enriched_trade = {
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': now.isoformat(),
                 'entry_time': trade_data.get('entry_time'),
                 'exit_time': trade_data.get('exit_time'),
                 'signal': trade_data.get('signal'),
@@ -113,22 +287,32 @@ class AdaptiveLearningSystem:
                 'success': trade_data.get('profit', 0) > 0,
                 'indicators': trade_data.get('indicators', {}),
                 'market_regime': trade_data.get('market_regime', {}),
-                'session': self._get_current_session(),
-                'hour': datetime.now().hour,
-                'weekday': datetime.now().weekday(),
+                'session': self._get_current_session(utc_hour),
+                'hour': now.hour,
+                'weekday': now.weekday(),
                 'reasons': trade_data.get('reasons', [])
             }
             
             self.trade_memory.append(enriched_trade)
+            self._append_columns(enriched_trade)
+            
+            # Ventana móvil de aciertos: entra este trade y sale el que queda fuera
+            self._recent_success_sum += enriched_trade['success']
+            if len(self.trade_memory) > _RECENT_WINDOW:
+                self._recent_success_sum -= bool(self.trade_memory[-_RECENT_WINDOW - 1].get('success', False))
+            if NUMBA_AVAILABLE:
+                self._trade_reason_ids.append(self._intern_reasons(enriched_trade['reasons']))
+                if len(self._reason_ids) > _MAX_REASON_IDS:
+                    self._reintern_reasons()
+            self._append_trade_log(enriched_trade)
             self.learning_stats['total_trades_learned'] += 1
+            self._trades_since_heavy += 1
             
-            # Aprender cada 10 trades
-            if len(self.trade_memory) >= 10 and len(self.trade_memory) % 10 == 0:
+            # Aprender cada 10 trades (el ciclo guarda el snapshot al terminar). Con la
+            # deque llena su longitud ya no cambia, así que se cuenta el total de trades
+            if self.learning_stats['total_trades_learned'] % _LEARN_EVERY == 0:
                 self.learn_from_trades()
             
-            # Guardar datos
-            self.save_learning_data()
-            
             logger.info(f"Trade registrado para aprendizaje: {trade_data.get('signal')} - Profit: ${trade_data.get('profit', 0):.2f}")
             
         except Exception as e:
@@ -142,127 +326,188 @@ class AdaptiveLearningSystem:
             
             logger.info("🧠 Iniciando ciclo de aprendizaje...")
             
-            # Convertir a DataFrame para análisis
-            df = pd.DataFrame(list(self.trade_memory))
-            
-            # Aprender de indicadores
-            self._learn_indicator_performance(df)
-            
-            # Aprender de sesiones
-            self._learn_session_performance(df)
+            # Columnas de la memoria como arrays de numpy, sin pasar por un DataFrame
+            success, profit, confidence, session, reasons = self._column_arrays()
             
-            # Aprender de confianza
-            self._learn_confidence_optimization(df)
+            # Aprender de confianza (barato: en cada ciclo)
+            self._learn_confidence_optimization(confidence, success)
             
-            # Aprender de gestión de riesgo
-            self._learn_risk_management(df)
+            # Indicadores, sesiones y riesgo apenas cambian en 10 trades: cada 50
+            if self._trades_since_heavy >= _HEAVY_LEARN_EVERY:
+                self._trades_since_heavy = 0
+                
+                # Aprender de indicadores
+                self._learn_indicator_performance(success, reasons)
+                
+                # Aprender de sesiones
+                self._learn_session_performance(success, session)
+                
+                # Aprender de gestión de riesgo
+                self._learn_risk_management(success, profit)
             
             # Actualizar estadísticas
+            self._params_version += 1
             self.learning_stats['learning_cycles'] += 1
-            self.learning_stats['last_optimization'] = datetime.now().isoformat()
+            now_iso = datetime.now().isoformat(timespec='seconds')
+            self.learning_stats['last_optimization'] = now_iso
             
             # Calcular mejora de precisión
-            recent_trades = df.tail(50)
-            if len(recent_trades) >= 20:
-                recent_accuracy = recent_trades['success'].mean()
-                old_trades = df.head(50) if len(df) >= 100 else df.head(len(df)//2)
-                old_accuracy = old_trades['success'].mean() if len(old_trades) > 0 else 0
+            # Cortes de numpy: vistas sin copia
+            n = success.size
+            if n >= 20:
+                recent_accuracy = success[-50:].mean()
+                old_end = 50 if n >= 100 else n // 2
+                old_accuracy = success[:old_end].mean() if old_end > 0 else 0
                 
                 self.learning_stats['accuracy_improvement'] = recent_accuracy - old_accuracy
             
             logger.info(f"✅ Ciclo de aprendizaje completado. Mejora de precisión: {self.learning_stats['accuracy_improvement']:.1%}")
             
+            self.save_learning_data(now_iso)
+            
         except Exception as e:
             logger.error(f"Error en aprendizaje: {e}")
     
-    def _learn_indicator_performance(self, df: pd.DataFrame):
+    @staticmethod
+    def _empty_columns() -> Dict:
+        """Columnas vacías (arrays contiguos para los valores numéricos)"""
+        return {
+            'success': array('b'),
+            'profit': array('d'),
+            'confidence': array('d'),
+            'session': [],
+            'reasons': []
+        }
+    
+    def _append_columns(self, trade: Dict):
+        """Añadir un trade a las columnas, recortándolas de vez en cuando como la deque"""
+        cols = self._cols
+        confidence = trade.get('confidence')
+        cols['success'].append(bool(trade.get('success', False)))
+        cols['profit'].append(float(trade.get('profit') or 0))
+        cols['confidence'].append(float('nan') if confidence is None else float(confidence))
+        cols['session'].append(trade.get('session'))
+        cols['reasons'].append(trade.get('reasons'))
+        
+        if len(cols['success']) > 2 * _TRADE_MEMORY_SIZE:
+            for column in cols.values():
+                del column[:-_TRADE_MEMORY_SIZE]
+    
+    def _column_arrays(self) -> Tuple:
+        """(success, profit, confidence, session, reasons) de los trades en memoria"""
+        n = len(self.trade_memory)
+        cols = self._cols
+        # frombuffer sobre un corte (copia): un buffer exportado impediría seguir añadiendo
+        return (
+            np.frombuffer(cols['success'][-n:], dtype=np.bool_),
+            np.frombuffer(cols['profit'][-n:], dtype=np.float64),
+            np.frombuffer(cols['confidence'][-n:], dtype=np.float64),
+            np.array(cols['session'][-n:]),
+            cols['reasons'][-n:]
+        )
+    
+    def _learn_indicator_performance(self, success: np.ndarray, reasons: List):
         """Aprender qué indicadores son más efectivos"""
         try:
             # Analizar correlación entre indicadores y éxito
-            successful_trades = df[df['success'] == True]
-            failed_trades = df[df['success'] == False]
+            successful_count = int(success.sum())
             
-            if len(successful_trades) < 5 or len(failed_trades) < 5:
+            if successful_count < 5 or len(success) - successful_count < 5:
                 return
             
-            # Analizar razones de trades exitosos vs fallidos
-            successful_reasons = []
-            failed_reasons = []
-            
-            for _, trade in successful_trades.iterrows():
-                if 'reasons' in trade and trade['reasons']:
-                    successful_reasons.extend(trade['reasons'])
-            
-            for _, trade in failed_trades.iterrows():
-                if 'reasons' in trade and trade['reasons']:
-                    failed_reasons.extend(trade['reasons'])
-            
             # Calcular efectividad de cada razón/indicador
             reason_effectiveness = {}
             
-            for reason in set(successful_reasons + failed_reasons):
-                success_count = successful_reasons.count(reason)
-                fail_count = failed_reasons.count(reason)
+            for reason, success_count, fail_count in self._tally_reasons(success, reasons):
                 total = success_count + fail_count
                 
                 if total >= 3:  # Mínimo 3 ocurrencias
                     effectiveness = success_count / total
                     reason_effectiveness[reason] = effectiveness
             
-            # Actualizar pesos de indicadores
+            # Contar por indicador las razones efectivas (>0.7) e inefectivas (<0.4) que lo mencionan
+            boosts = np.zeros(len(_INDICATORS))
+            cuts = np.zeros(len(_INDICATORS))
             for reason, effectiveness in reason_effectiveness.items():
-                for indicator in self.indicator_weights.keys():
-                    if indicator.lower() in reason.lower():
-                        # Ajustar peso basado en efectividad
-                        if effectiveness > 0.7:
-                            self.indicator_weights[indicator] = min(1.5, self.indicator_weights[indicator] * 1.1)
-                        elif effectiveness < 0.4:
-                            self.indicator_weights[indicator] = max(0.5, self.indicator_weights[indicator] * 0.9)
+                if 0.4 <= effectiveness <= 0.7:
+                    continue  # Efectividad neutra: no cambia ningún peso
+                reason_lower = reason.lower()
+                hits = [i for i, indicator in enumerate(_INDICATORS) if indicator in reason_lower]
+                (boosts if effectiveness > 0.7 else cuts)[hits] += 1
+            
+            # Actualizar todos los pesos de una vez: x1.1 por razón efectiva, x0.9 por inefectiva
+            self.weights_vec = np.clip(self.weights_vec * 1.1 ** boosts * 0.9 ** cuts, 0.5, 1.5)
+            self._weights_dict = None
             
             logger.info(f"Pesos de indicadores actualizados: {self.indicator_weights}")
             
         except Exception as e:
             logger.error(f"Error aprendiendo indicadores: {e}")
     
-    def _learn_session_performance(self, df: pd.DataFrame):
+    def _tally_reasons(self, success: np.ndarray, reasons: List) -> List[Tuple[str, int, int]]:
+        """(razón, aciertos, fallos) de cada razón distinta en la memoria de trades"""
+        if NUMBA_AVAILABLE and len(self._trade_reason_ids) == len(success):
+            lengths = [trade_ids.size for trade_ids in self._trade_reason_ids]
+            offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=offsets[1:])
+            flat_ids = np.concatenate(self._trade_reason_ids) if lengths else np.empty(0, dtype=np.int32)
+            
+            success_counts, fail_counts = _tally_reason_ids(flat_ids, offsets, success, len(self._reason_ids))
+            names = list(self._reason_ids)
+            return [(names[i], int(success_counts[i]), int(fail_counts[i]))
+                    for i in np.flatnonzero(success_counts + fail_counts)]
+        
+        # Sin numba: contar razones de trades exitosos vs fallidos con Counter
+        successful_reasons = Counter()
+        failed_reasons = Counter()
+        
+        for trade_success, trade_reasons in zip(success, reasons):
+            if trade_reasons:
+                (successful_reasons if trade_success else failed_reasons).update(trade_reasons)
+        
+        return [(reason, successful_reasons[reason], failed_reasons[reason])
+                for reason in successful_reasons.keys() | failed_reasons.keys()]
+    
+    def _learn_session_performance(self, success: np.ndarray, sessions: np.ndarray):
         """Aprender qué sesiones son más rentables"""
         try:
-            session_performance = df.groupby('session').agg({
-                'success': 'mean',
-                'profit': 'mean'
-            }).to_dict()
-            
-            if 'success' in session_performance:
-                for session, success_rate in session_performance['success'].items():
-                    if session in self.adaptive_params['session_preferences']:
-                        if success_rate > 0.6:
-                            self.adaptive_params['session_preferences'][session] = min(1.8, 
-                                self.adaptive_params['session_preferences'][session] * 1.05)
-                        elif success_rate < 0.4:
-                            self.adaptive_params['session_preferences'][session] = max(0.5,
-                                self.adaptive_params['session_preferences'][session] * 0.95)
+            preferences = self.adaptive_params['session_preferences']
+            
+            # Pocas sesiones: una máscara por sesión es más barata que un groupby
+            for session in preferences:
+                mask = sessions == session
+                if not mask.any():
+                    continue
+                
+                success_rate = success[mask].mean()
+                if success_rate > 0.6:
+                    preferences[session] = min(1.8, preferences[session] * 1.05)
+                elif success_rate < 0.4:
+                    preferences[session] = max(0.5, preferences[session] * 0.95)
             
             logger.info(f"Preferencias de sesión actualizadas: {self.adaptive_params['session_preferences']}")
             
         except Exception as e:
             logger.error(f"Error aprendiendo sesiones: {e}")
     
-    def _learn_confidence_optimization(self, df: pd.DataFrame):
+    def _learn_confidence_optimization(self, confidence: np.ndarray, success: np.ndarray):
         """Optimizar el nivel de confianza mínima"""
         try:
-            # Analizar relación entre confianza y éxito
-            confidence_bins = pd.cut(df['confidence'], bins=[0, 70, 75, 80, 85, 90, 100])
-            confidence_performance = df.groupby(confidence_bins)['success'].mean()
-            
-            # Encontrar el punto óptimo
+            # Analizar relación entre confianza y éxito (fuera de rango o NaN no cuentan)
+            n_bins = len(_CONFIDENCE_BINS) - 1
+            bin_idx = np.digitize(confidence, _CONFIDENCE_BINS, right=True) - 1
+            valid = (bin_idx >= 0) & (bin_idx < n_bins)
+            counts = np.bincount(bin_idx[valid], minlength=n_bins)
+            wins = np.bincount(bin_idx[valid], weights=success[valid].astype(np.float64), minlength=n_bins)
+            performance = np.divide(wins, counts, out=np.zeros(n_bins), where=counts > 0)
+            
+            # Encontrar el punto óptimo (el primer tramo con mejor tasa de acierto)
             best_confidence = 78.0
-            best_performance = 0.0
+            best_bin = int(np.argmax(performance))
             
-            for bin_range, performance in confidence_performance.items():
-                if pd.notna(performance) and performance > best_performance:
-                    best_performance = performance
-                    # Usar el punto medio del bin
-                    best_confidence = (bin_range.left + bin_range.right) / 2
+            if performance[best_bin] > 0:
+                # Usar el punto medio del bin
+                best_confidence = (_CONFIDENCE_BINS[best_bin] + _CONFIDENCE_BINS[best_bin + 1]) / 2
             
             # Ajustar confianza mínima gradualmente
             current_confidence = self.adaptive_params['min_confidence']
@@ -285,21 +530,22 @@ class AdaptiveLearningSystem:
         except Exception as e:
             logger.error(f"Error optimizando confianza: {e}")
     
-    def _learn_risk_management(self, df: pd.DataFrame):
+    def _learn_risk_management(self, success: np.ndarray, profit: np.ndarray):
         """Optimizar gestión de riesgo"""
         try:
-            # Analizar trades por profit factor
-            recent_trades = df.tail(50)
+            # Analizar trades por profit factor (vistas de los últimos 50, sin copias)
+            recent_profit = profit[-50:]
+            recent_success = success[-50:]
             
-            if len(recent_trades) < 20:
+            if recent_profit.size < 20:
                 return
             
-            winning_trades = recent_trades[recent_trades['success'] == True]
-            losing_trades = recent_trades[recent_trades['success'] == False]
+            winning_profit = recent_profit[recent_success]
+            losing_profit = recent_profit[~recent_success]
             
-            if len(winning_trades) > 0 and len(losing_trades) > 0:
-                avg_win = winning_trades['profit'].mean()
-                avg_loss = abs(losing_trades['profit'].mean())
+            if winning_profit.size > 0 and losing_profit.size > 0:
+                avg_win = winning_profit.mean()
+                avg_loss = abs(losing_profit.mean())
                 
                 current_profit_factor = avg_win / avg_loss if avg_loss > 0 else 1
                 
@@ -331,42 +577,73 @@ class AdaptiveLearningSystem:
             logger.error(f"Error calculando confianza adaptativa: {e}")
             return base_confidence
     
-    def get_adaptive_weights(self) -> Dict[str, float]:
-        """Obtener pesos adaptativos de indicadores"""
+    @property
+    def indicator_weights(self) -> Dict[str, float]:
+        """Pesos por indicador como dict (para JSON y consumidores)"""
+        if self._weights_dict is None:
+            self._weights_dict = {name: float(weight) for name, weight in zip(_INDICATORS, self.weights_vec)}
+        return self._weights_dict
+    
+    @indicator_weights.setter
+    def indicator_weights(self, weights: Dict[str, float]):
+        vec = np.ones(len(_INDICATORS))
+        for name, weight in weights.items():
+            if name in _INDICATOR_INDEX:
+                vec[_INDICATOR_INDEX[name]] = weight
+        self.weights_vec = vec
+        self._weights_dict = None
+    
+    def get_weights_vector(self) -> np.ndarray:
+        """Pesos como vector de solo lectura en el orden de _INDICATORS (para productos escalares)"""
+        view = self.weights_vec.view()
+        view.flags.writeable = False
+        return view
+    
+    def get_adaptive_weights(self) -> MappingProxyType:
+        """Obtener pesos adaptativos de indicadores (vista de solo lectura, sin copiar; los valores son floats)"""
+        return MappingProxyType(self.indicator_weights)
+    
+    def get_adaptive_weights_copy(self) -> Dict[str, float]:
+        """Obtener una copia modificable de los pesos adaptativos"""
         return self.indicator_weights.copy()
     
-    def get_adaptive_params(self) -> Dict:
-        """Obtener parámetros adaptativos actuales"""
-        return self.adaptive_params.copy()
+    def get_adaptive_params(self) -> Mapping:
+        """Obtener parámetros adaptativos actuales (vista sin copiar, de solo lectura también en los dicts anidados como session_preferences)"""
+        return _ReadOnlyView(self.adaptive_params)
+    
+    def get_adaptive_params_copy(self) -> Dict:
+        """Obtener una copia modificable de los parámetros adaptativos (profunda: no comparte los dicts anidados)"""
+        return copy.deepcopy(self.adaptive_params)
+    
+    def get_params_version(self) -> int:
+        """Versión de pesos y parámetros: cambia solo cuando el aprendizaje los modifica"""
+        return self._params_version
     
     def get_learning_stats(self) -> Dict:
         """Obtener estadísticas de aprendizaje"""
         stats = self.learning_stats.copy()
         
-        if len(self.trade_memory) >= 20:
-            recent_trades = list(self.trade_memory)[-20:]
-            recent_success_rate = sum(1 for t in recent_trades if t.get('success', False)) / len(recent_trades)
+        trades = self.trade_memory
+        n = len(trades)
+        
+        if n >= _RECENT_WINDOW:
+            recent_success_rate = self._recent_success_sum / _RECENT_WINDOW
             stats['recent_success_rate'] = recent_success_rate
             
-            if len(self.trade_memory) >= 50:
-                older_trades = list(self.trade_memory)[-50:-20]
-                older_success_rate = sum(1 for t in older_trades if t.get('success', False)) / len(older_trades)
+            if n >= 50:
+                # Acceso por índice a la deque: sin copiar los 1000 trades
+                older_success = sum(1 for i in range(n - 50, n - _RECENT_WINDOW) if trades[i].get('success', False))
+                older_success_rate = older_success / (50 - _RECENT_WINDOW)
                 stats['improvement_trend'] = recent_success_rate - older_success_rate
         
         return stats
     
-    def _get_current_session(self) -> str:
-        """Determinar sesión actual"""
-        hour = datetime.utcnow().hour
+    def _get_current_session(self, hour: Optional[int] = None) -> str:
+        """Determinar sesión actual (o la de la hora UTC indicada)"""
+        if hour is None:
+            hour = datetime.utcnow().hour
         
-        if 13 <= hour <= 17:
-            return 'overlap'
-        elif 8 <= hour <= 17:
-            return 'london'
-        elif 13 <= hour <= 22:
-            return 'new_york'
-        else:
-            return 'asian'
+        return _SESSION_BY_HOUR[hour]
     
     def should_trade_with_ml(self, base_should_trade: bool, base_confidence: float, 
                            current_session: str, indicators: Dict) -> Tuple[bool, float, str]:
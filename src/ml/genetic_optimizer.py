@@ -3,17 +3,175 @@ Optimizador Genético para Estrategias de Trading
 Evoluciona parámetros de estrategias automáticamente
 """
 
+import glob
+import hashlib
+import io
 import logging
+import os
 import numpy as np
-import random
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
-import copy
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+# numba es opcional: sin él los cálculos se hacen con operaciones de numpy
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Serialización y escritura atómica compartidas
+try:
+    from ..utils.persistence import dumps, loads, write_atomic
+except ImportError:
+    # Importaciones absolutas (cuando se ejecuta directamente)
+    from utils.persistence import dumps, loads, write_atomic
 
 logger = logging.getLogger(__name__)
 
+# Entradas máximas de la caché de fitness (LRU)
+_FITNESS_CACHE_SIZE = 1024
+
+# Pares de genes que deben ir en orden (menor, mayor) y penalización si no lo están
+_ORDERED_GENE_PAIRS = (
+    ('rsi_oversold', 'rsi_overbought', 20),  # RSI oversold debe ser menor que overbought
+    ('ema_fast', 'ema_slow', 15),  # EMA rápida debe ser menor que lenta
+    ('stop_loss_atr', 'take_profit_atr', 10)  # SL debe ser menor que TP
+)
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _fitness_kernel(profits):
+        """Fitness de una serie de profits (sin penalización) en un solo recorrido"""
+        total_trades = profits.size
+        cumulative_profit = 0.0
+        peak = 0.0
+        max_drawdown = 0.0
+        winning_trades = 0
+        for i in range(total_trades):
+            cumulative_profit += profits[i]
+            if profits[i] > 0:
+                winning_trades += 1
+            if cumulative_profit > peak:
+                peak = cumulative_profit
+            if peak - cumulative_profit > max_drawdown:
+                max_drawdown = peak - cumulative_profit
+        
+        avg_profit = cumulative_profit / total_trades
+        sharpe_ratio = 0.0
+        if total_trades > 1:
+            variance = 0.0
+            for i in range(total_trades):
+                variance += (profits[i] - avg_profit) ** 2
+            profit_std = np.sqrt(variance / total_trades)
+            if profit_std > 0:
+                sharpe_ratio = avg_profit / profit_std
+        
+        return (
+            winning_trades / total_trades * 40 +
+            cumulative_profit / max(1.0, abs(max_drawdown)) * 30 +
+            sharpe_ratio * 20 +
+            min(total_trades / 50, 1.0) * 10
+        )
+    
+    @njit(cache=True)
+    def _penalty_kernel(genes, lo, hi, pairs, pair_weights):
+        """Penalización por parámetros ilógicos o extremos de cada fila de genes"""
+        penalties = np.zeros(genes.shape[0])
+        for i in range(genes.shape[0]):
+            penalty = 0.0
+            for k in range(pairs.shape[0]):
+                if genes[i, pairs[k, 0]] >= genes[i, pairs[k, 1]]:
+                    penalty += pair_weights[k]
+            for g in range(genes.shape[1]):
+                margin = (hi[g] - lo[g]) * 0.1
+                if genes[i, g] <= lo[g] + margin or genes[i, g] >= hi[g] - margin:
+                    penalty += 2
+            penalties[i] = penalty
+        return penalties
+    
+    @njit(cache=True)
+    def _diversity_kernel(population, ranges):
+        """Distancia media normalizada entre todos los pares de individuos"""
+        n, n_genes = population.shape
+        total_diversity = 0.0
+        comparisons = 0
+        for i in range(n):
+            for j in range(i + 1, n):
+                diversity = 0.0
+                for g in range(n_genes):
+                    if ranges[g] > 0:
+                        diversity += abs(population[i, g] - population[j, g]) / ranges[g]
+                total_diversity += diversity / n_genes
+                comparisons += 1
+        return total_diversity / comparisons if comparisons > 0 else 0.0
+else:
+    def _fitness_kernel(profits):
+        """Fitness de una serie de profits (sin penalización)"""
+        total_trades = profits.size
+        cumulative_profit = np.cumsum(profits)
+        total_profit = float(cumulative_profit[-1])
+        
+        # Calcular métricas
+        win_rate = float(np.count_nonzero(profits > 0)) / total_trades
+        avg_profit = total_profit / total_trades
+        
+        # Calcular drawdown máximo (el pico parte de 0, antes del primer trade)
+        peak = np.maximum(np.maximum.accumulate(cumulative_profit), 0.0)
+        max_drawdown = float((peak - cumulative_profit).max())
+        
+        # Calcular Sharpe ratio simplificado
+        if total_trades > 1:
+            profit_std = float(profits.std())
+            sharpe_ratio = (avg_profit / profit_std) if profit_std > 0 else 0
+        else:
+            sharpe_ratio = 0
+        
+        # Función de fitness compuesta
+        return (
+            win_rate * 40 +  # 40% peso para win rate
+            (total_profit / max(1, abs(max_drawdown))) * 30 +  # 30% profit/drawdown ratio
+            sharpe_ratio * 20 +  # 20% Sharpe ratio
+            min(total_trades / 50, 1.0) * 10  # 10% número de trades (hasta 50)
+        )
+    
+    def _penalty_kernel(genes, lo, hi, pairs, pair_weights):
+        """Penalización por parámetros ilógicos o extremos de cada fila de genes"""
+        margin = (hi - lo) * 0.1
+        penalties = ((genes[:, pairs[:, 0]] >= genes[:, pairs[:, 1]]) * pair_weights).sum(axis=1)
+        penalties += 2 * ((genes <= lo + margin) | (genes >= hi - margin)).sum(axis=1)
+        return penalties
+    
+    def _diversity_kernel(population, ranges):
+        """Distancia media normalizada entre todos los pares de individuos"""
+        n, n_genes = population.shape
+        if n < 2:
+            return 0.0
+        
+        # Matriz (n, n) de distancias L1 normalizadas; se promedia el triángulo superior
+        normalized = population * np.divide(1.0, ranges, out=np.zeros_like(ranges), where=ranges > 0)
+        distances = np.abs(normalized[:, None, :] - normalized[None, :, :]).sum(axis=2)
+        return float(distances[np.triu_indices(n, k=1)].mean()) / n_genes
+
+# Función de módulo para que ProcessPoolExecutor pueda enviarla a otros procesos
+def _trade_fitness(trade_results: List[Dict]) -> float:
+    """Fitness basado en resultados de trading, sin penalización por parámetros"""
+    try:
+        if not trade_results:
+            return 0.0
+        
+        profits = np.fromiter(
+            (trade.get('profit', 0) for trade in trade_results), dtype=np.float64, count=len(trade_results)
+        )
+        return float(_fitness_kernel(profits))
+    
+    except Exception as e:
+        logger.error(f"Error evaluando fitness: {e}")
+        return 0.0
+
 class GeneticOptimizer:
-    def __init__(self):
+    def __init__(self, n_workers: int = 1, seed: Optional[int] = None):
         # Configuración del algoritmo genético
         self.population_size = 20
         self.mutation_rate = 0.15
@@ -21,8 +179,17 @@ class GeneticOptimizer:
         self.elite_size = 4  # Mejores individuos que pasan directamente
         self.max_generations = 50
         
+        # Generador aleatorio propio (PCG64); una semilla fija hace reproducible la evolución
+        self.rng = np.random.default_rng(seed)
+        
+        # Procesos para evaluar el fitness en paralelo (1 = evaluación en serie)
+        self.n_workers = max(1, n_workers)
+        self._pool = None
+        
+        # Caché de fitness: genes cuantizados + resumen de los trades -> fitness
+        self._fitness_cache = OrderedDict()
+        
         # Población actual
-        self.population = []
         self.fitness_scores = []
         self.generation = 0
         self.best_individual = None
@@ -48,23 +215,52 @@ class GeneticOptimizer:
             'take_profit_atr': {'min': 2.0, 'max': 4.0, 'type': 'float'}
         }
         
+        # Límites y tipo de cada gen, alineados con las columnas de la población
+        self._gene_names = tuple(self.gene_definitions)
+        self._lo = np.array([g['min'] for g in self.gene_definitions.values()], dtype=np.float64)
+        self._hi = np.array([g['max'] for g in self.gene_definitions.values()], dtype=np.float64)
+        self._is_int = np.array([g['type'] == 'int' for g in self.gene_definitions.values()])
+        self._int_flags = tuple(self._is_int.tolist())
+        self._n_genes = len(self._gene_names)
+        self._ranges = self._hi - self._lo
+        self._mutation_sigma = self._ranges * 0.1  # Desviación de la mutación gaussiana
+        self._quantum = self._ranges * 0.01  # Resolución de la caché: 1% del rango
+        self._pair_idx = np.array(
+            [[self._gene_names.index(low), self._gene_names.index(high)] for low, high, _ in _ORDERED_GENE_PAIRS],
+            dtype=np.int64
+        )
+        self._pair_weights = np.array([weight for _, _, weight in _ORDERED_GENE_PAIRS], dtype=np.float64)
+        
+        # Población actual: una fila por individuo, una columna por gen
+        self.population_arr = np.empty((0, self._n_genes), dtype=np.float64)
+    
+    @property
+    def population(self) -> List[Dict]:
+        """Población como lista de diccionarios de parámetros"""
+        return [self._to_individual(row) for row in self.population_arr]
+    
+    def _to_individual(self, row: np.ndarray) -> Dict:
+        """Convertir una fila de la población en diccionario de parámetros"""
+        return {
+            name: int(value) if is_int else value
+            for name, value, is_int in zip(self._gene_names, row.tolist(), self._int_flags)
+        }
+    
+    def _from_individuals(self, individuals: List[Dict]) -> np.ndarray:
+        """Convertir una lista de diccionarios de parámetros en matriz de población"""
+        rows = [[individual[name] for name in self._gene_names] for individual in individuals]
+        return np.array(rows, dtype=np.float64).reshape(-1, self._n_genes)
+    
+    def _random_individuals(self, count: int) -> np.ndarray:
+        """Generar individuos aleatorios dentro de los límites de cada gen"""
+        individuals = self.rng.uniform(self._lo, self._hi, (count, self._n_genes))
+        individuals[:, self._is_int] = np.rint(individuals[:, self._is_int])
+        return individuals
+        
     def initialize_population(self):
         """Inicializar población aleatoria"""
         try:
-            self.population = []
-            
-            for _ in range(self.population_size):
-                individual = {}
-                
-                for gene_name, gene_def in self.gene_definitions.items():
-                    if gene_def['type'] == 'int':
-                        value = random.randint(gene_def['min'], gene_def['max'])
-                    else:  # float
-                        value = random.uniform(gene_def['min'], gene_def['max'])
-                    
-                    individual[gene_name] = value
-                
-                self.population.append(individual)
+            self.population_arr = self._random_individuals(self.population_size)
             
             self.fitness_scores = [0.0] * self.population_size
             logger.info(f"🧬 Población genética inicializada: {self.population_size} individuos")
@@ -74,220 +270,191 @@ class GeneticOptimizer:
     
     def evaluate_fitness(self, individual: Dict, trade_results: List[Dict]) -> float:
         """Evaluar fitness de un individuo basado en resultados de trading"""
-        try:
-            if not trade_results:
-                return 0.0
-            
-            # Métricas de rendimiento
-            total_trades = len(trade_results)
-            winning_trades = sum(1 for trade in trade_results if trade.get('profit', 0) > 0)
-            total_profit = sum(trade.get('profit', 0) for trade in trade_results)
-            
-            if total_trades == 0:
-                return 0.0
-            
-            # Calcular métricas
-            win_rate = winning_trades / total_trades
-            avg_profit = total_profit / total_trades
-            
-            # Calcular drawdown máximo
-            cumulative_profit = 0
-            peak = 0
-            max_drawdown = 0
-            
-            for trade in trade_results:
-                cumulative_profit += trade.get('profit', 0)
-                if cumulative_profit > peak:
-                    peak = cumulative_profit
-                drawdown = peak - cumulative_profit
-                if drawdown > max_drawdown:
-                    max_drawdown = drawdown
-            
-            # Calcular Sharpe ratio simplificado
-            profits = [trade.get('profit', 0) for trade in trade_results]
-            if len(profits) > 1:
-                profit_std = np.std(profits)
-                sharpe_ratio = (avg_profit / profit_std) if profit_std > 0 else 0
-            else:
-                sharpe_ratio = 0
-            
-            # Función de fitness compuesta
-            fitness = (
-                win_rate * 40 +  # 40% peso para win rate
-                (total_profit / max(1, abs(max_drawdown))) * 30 +  # 30% profit/drawdown ratio
-                sharpe_ratio * 20 +  # 20% Sharpe ratio
-                min(total_trades / 50, 1.0) * 10  # 10% número de trades (hasta 50)
-            )
-            
-            # Penalizar parámetros extremos
-            penalty = self._calculate_parameter_penalty(individual)
-            fitness -= penalty
-            
-            return max(0, fitness)
-            
-        except Exception as e:
-            logger.error(f"Error evaluando fitness: {e}")
+        if not trade_results:
             return 0.0
+        
+        # Penalizar parámetros extremos
+        return max(0, _trade_fitness(trade_results) - self._calculate_parameter_penalty(individual))
     
     def _calculate_parameter_penalty(self, individual: Dict) -> float:
         """Calcular penalización por parámetros extremos"""
         try:
-            penalty = 0.0
-            
-            # Penalizar configuraciones ilógicas
-            if individual.get('rsi_oversold', 30) >= individual.get('rsi_overbought', 70):
-                penalty += 20  # RSI oversold debe ser menor que overbought
-            
-            if individual.get('ema_fast', 12) >= individual.get('ema_slow', 26):
-                penalty += 15  # EMA rápida debe ser menor que lenta
-            
-            if individual.get('stop_loss_atr', 1.5) >= individual.get('take_profit_atr', 3.0):
-                penalty += 10  # SL debe ser menor que TP
-            
-            # Penalizar valores muy extremos
-            for gene_name, value in individual.items():
-                gene_def = self.gene_definitions.get(gene_name, {})
-                if gene_def:
-                    min_val = gene_def['min']
-                    max_val = gene_def['max']
-                    range_val = max_val - min_val
-                    
-                    # Penalizar si está en el 10% extremo
-                    if value <= min_val + range_val * 0.1 or value >= max_val - range_val * 0.1:
-                        penalty += 2
-            
-            return penalty
-            
+            # Los genes ausentes toman el centro de su rango, que no penaliza
+            row = np.array(
+                [[individual.get(name, (lo + hi) / 2) for name, lo, hi in zip(self._gene_names, self._lo, self._hi)]],
+                dtype=np.float64
+            )
+            return float(_penalty_kernel(row, self._lo, self._hi, self._pair_idx, self._pair_weights)[0])
+        
         except Exception as e:
             logger.error(f"Error calculando penalización: {e}")
             return 0.0
     
-    def selection(self) -> List[Dict]:
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        """Obtener el pool de procesos de evaluación, creándolo la primera vez"""
+        if self.n_workers <= 1:
+            return None
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.n_workers)
+        return self._pool
+    
+    def _fitness_key(self, genes: np.ndarray, trade_results: List[Dict]) -> bytes:
+        """Clave de caché de fitness para unos genes y sus resultados de trading"""
+        quantized = np.round(genes / self._quantum).astype(np.int32)
+        profits = np.fromiter(
+            (trade.get('profit', 0) for trade in trade_results), dtype=np.float64, count=len(trade_results)
+        )
+        return quantized.tobytes() + hashlib.blake2b(profits.tobytes(), digest_size=16).digest()
+    
+    def _evaluate_population(self, trade_results: List[List[Dict]]) -> List[float]:
+        """Evaluar el fitness de toda la población, en paralelo si hay varios workers"""
+        keys = [self._fitness_key(genes, results) for genes, results in zip(self.population_arr, trade_results)]
+        
+        # Los individuos equivalentes ya evaluados (p. ej. la élite) no se vuelven a evaluar
+        scores = []
+        for key in keys:
+            score = self._fitness_cache.get(key)
+            if score is not None:
+                self._fitness_cache.move_to_end(key)
+            scores.append(score)
+        
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if not missing:
+            return scores
+        
+        results = [trade_results[i] for i in missing]
+        
+        base_fitness = None
+        pool = self._get_pool()
+        if pool is not None:
+            try:
+                chunksize = max(1, len(results) // (4 * self.n_workers))
+                base_fitness = list(pool.map(_trade_fitness, results, chunksize=chunksize))
+            except Exception as e:
+                logger.error(f"Error en evaluación paralela, evaluando en serie: {e}")
+                self.close()
+        
+        if base_fitness is None:
+            base_fitness = list(map(_trade_fitness, results))
+        
+        # Penalizar parámetros extremos de todos los individuos a la vez
+        penalties = _penalty_kernel(self.population_arr[missing], self._lo, self._hi, self._pair_idx, self._pair_weights)
+        computed = np.maximum(np.array(base_fitness) - penalties, 0.0).tolist()
+        
+        for i, score in zip(missing, computed):
+            scores[i] = score
+            self._fitness_cache[keys[i]] = score
+        while len(self._fitness_cache) > _FITNESS_CACHE_SIZE:
+            self._fitness_cache.popitem(last=False)
+        
+        return scores
+    
+    def close(self):
+        """Cerrar el pool de procesos de evaluación"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+    
+    def selection(self) -> np.ndarray:
         """Selección por torneo"""
         try:
-            selected = []
             tournament_size = 3
+            n_select = max(0, self.population_size - self.elite_size)
+            fitness = np.asarray(self.fitness_scores, dtype=np.float64)
             
-            for _ in range(self.population_size - self.elite_size):
-                # Torneo
-                tournament_indices = random.sample(range(len(self.population)), tournament_size)
-                tournament_fitness = [self.fitness_scores[i] for i in tournament_indices]
-                
-                # Seleccionar el mejor del torneo
-                winner_idx = tournament_indices[np.argmax(tournament_fitness)]
-                selected.append(copy.deepcopy(self.population[winner_idx]))
+            # Todos los torneos a la vez: una fila por torneo con participantes distintos
+            keys = self.rng.random((n_select, len(self.population_arr)))
+            tournaments = np.argpartition(keys, tournament_size - 1, axis=1)[:, :tournament_size]
             
-            return selected
+            # Seleccionar el mejor de cada torneo
+            winners = tournaments[np.arange(n_select), fitness[tournaments].argmax(axis=1)]
+            return self.population_arr[winners]
             
         except Exception as e:
             logger.error(f"Error en selección genética: {e}")
-            return self.population[:self.population_size - self.elite_size]
+            return self.population_arr[:self.population_size - self.elite_size].copy()
     
-    def crossover(self, parent1: Dict, parent2: Dict) -> Tuple[Dict, Dict]:
+    def crossover(self, parent1: np.ndarray, parent2: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """Cruzamiento de dos padres"""
         try:
-            if random.random() > self.crossover_rate:
-                return copy.deepcopy(parent1), copy.deepcopy(parent2)
-            
-            child1 = copy.deepcopy(parent1)
-            child2 = copy.deepcopy(parent2)
-            
-            # Cruzamiento uniforme
-            for gene_name in self.gene_definitions.keys():
-                if random.random() < 0.5:
-                    child1[gene_name], child2[gene_name] = child2[gene_name], child1[gene_name]
+            if self.rng.random() > self.crossover_rate:
+                return parent1.copy(), parent2.copy()
             
-            return child1, child2
+            # Cruzamiento uniforme: cada gen se intercambia con probabilidad 0.5
+            swap = self.rng.random(self._n_genes) < 0.5
+            return np.where(swap, parent2, parent1), np.where(swap, parent1, parent2)
             
         except Exception as e:
             logger.error(f"Error en cruzamiento: {e}")
             return parent1, parent2
     
-    def mutate(self, individual: Dict) -> Dict:
-        """Mutación de un individuo"""
+    def mutate(self, individuals: np.ndarray) -> np.ndarray:
+        """Mutación gaussiana de uno o varios individuos"""
         try:
-            mutated = copy.deepcopy(individual)
-            
-            for gene_name, gene_def in self.gene_definitions.items():
-                if random.random() < self.mutation_rate:
-                    if gene_def['type'] == 'int':
-                        # Mutación gaussiana para enteros
-                        current_value = mutated[gene_name]
-                        mutation_range = (gene_def['max'] - gene_def['min']) * 0.1
-                        new_value = int(current_value + random.gauss(0, mutation_range))
-                        new_value = max(gene_def['min'], min(gene_def['max'], new_value))
-                        mutated[gene_name] = new_value
-                    else:
-                        # Mutación gaussiana para floats
-                        current_value = mutated[gene_name]
-                        mutation_range = (gene_def['max'] - gene_def['min']) * 0.1
-                        new_value = current_value + random.gauss(0, mutation_range)
-                        new_value = max(gene_def['min'], min(gene_def['max'], new_value))
-                        mutated[gene_name] = new_value
+            noise = self.rng.normal(0.0, self._mutation_sigma, individuals.shape)
+            mask = self.rng.random(individuals.shape) < self.mutation_rate
             
+            mutated = np.clip(individuals + noise * mask, self._lo, self._hi)
+            mutated[..., self._is_int] = np.rint(mutated[..., self._is_int])
             return mutated
             
         except Exception as e:
             logger.error(f"Error en mutación: {e}")
-            return individual
+            return individuals
     
     def evolve_generation(self, trade_results_per_individual: List[List[Dict]]):
         """Evolucionar una generación"""
         try:
             # Evaluar fitness de toda la población
-            for i, individual in enumerate(self.population):
-                trade_results = trade_results_per_individual[i] if i < len(trade_results_per_individual) else []
-                self.fitness_scores[i] = self.evaluate_fitness(individual, trade_results)
+            trade_results = [
+                trade_results_per_individual[i] if i < len(trade_results_per_individual) else []
+                for i in range(len(self.population_arr))
+            ]
+            self.fitness_scores = self._evaluate_population(trade_results)
+            fs = np.asarray(self.fitness_scores, dtype=np.float64)
             
             # Actualizar mejor individuo
-            best_idx = np.argmax(self.fitness_scores)
-            if self.fitness_scores[best_idx] > self.best_fitness:
-                self.best_fitness = self.fitness_scores[best_idx]
-                self.best_individual = copy.deepcopy(self.population[best_idx])
+            best_idx = int(fs.argmax())
+            best_fitness = float(fs[best_idx])
+            if best_fitness > self.best_fitness:
+                self.best_fitness = best_fitness
+                self.best_individual = self._to_individual(self.population_arr[best_idx])
             
             # Guardar estadísticas de la generación
             generation_stats = {
                 'generation': self.generation,
-                'best_fitness': max(self.fitness_scores),
-                'avg_fitness': np.mean(self.fitness_scores),
-                'worst_fitness': min(self.fitness_scores),
-                'std_fitness': np.std(self.fitness_scores)
+                'best_fitness': best_fitness,
+                'avg_fitness': float(fs.mean()),
+                'worst_fitness': float(fs.min()),
+                'std_fitness': float(fs.std())
             }
             self.evolution_history.append(generation_stats)
             
-            # Selección de élite
-            elite_indices = np.argsort(self.fitness_scores)[-self.elite_size:]
-            elite = [copy.deepcopy(self.population[i]) for i in elite_indices]
+            # Selección de élite (sin ordenar: solo hacen falta los k mejores)
+            elite_size = min(self.elite_size, len(fs))
+            elite_indices = np.argpartition(fs, -elite_size)[-elite_size:] if elite_size > 0 else []
+            elite = self.population_arr[elite_indices]
             
             # Selección, cruzamiento y mutación
             selected = self.selection()
-            new_population = elite.copy()
+            n_children = max(0, self.population_size - len(elite))
             
-            # Generar nueva población
-            while len(new_population) < self.population_size:
-                if len(selected) >= 2:
-                    parent1 = random.choice(selected)
-                    parent2 = random.choice(selected)
+            if len(selected) >= 2:
+                children = np.empty((n_children, self._n_genes), dtype=np.float64)
+                parents = self.rng.integers(len(selected), size=((n_children + 1) // 2, 2))
+                for i, (parent1, parent2) in zip(range(0, n_children, 2), parents):
+                    child1, child2 = self.crossover(selected[parent1], selected[parent2])
                     
-                    child1, child2 = self.crossover(parent1, parent2)
-                    child1 = self.mutate(child1)
-                    child2 = self.mutate(child2)
-                    
-                    new_population.append(child1)
-                    if len(new_population) < self.population_size:
-                        new_population.append(child2)
-                else:
-                    # Si no hay suficientes seleccionados, generar aleatoriamente
-                    new_individual = {}
-                    for gene_name, gene_def in self.gene_definitions.items():
-                        if gene_def['type'] == 'int':
-                            value = random.randint(gene_def['min'], gene_def['max'])
-                        else:
-                            value = random.uniform(gene_def['min'], gene_def['max'])
-                        new_individual[gene_name] = value
-                    new_population.append(new_individual)
-            
-            self.population = new_population[:self.population_size]
+                    children[i] = child1
+                    if i + 1 < n_children:
+                        children[i + 1] = child2
+                
+                children = self.mutate(children)
+            else:
+                # Si no hay suficientes seleccionados, generar aleatoriamente
+                children = self._random_individuals(n_children)
+            
+            self.population_arr = np.vstack((elite, children))[:self.population_size]
             self.generation += 1
             
             logger.info(f"🧬 Generación {self.generation}: Mejor fitness = {generation_stats['best_fitness']:.2f}")
@@ -297,7 +464,7 @@ class GeneticOptimizer:
     
     def get_best_parameters(self) -> Dict:
         """Obtener mejores parámetros encontrados"""
-        return copy.deepcopy(self.best_individual) if self.best_individual else {}
+        return self.best_individual.copy() if self.best_individual else {}
     
     def get_evolution_statistics(self) -> Dict:
         """Obtener estadísticas de evolución"""
@@ -340,55 +507,47 @@ class GeneticOptimizer:
     def _calculate_population_diversity(self) -> float:
         """Calcular diversidad de la población"""
         try:
-            if not self.population:
+            if len(self.population_arr) == 0:
                 return 0.0
             
-            # Calcular diversidad basada en diferencias en parámetros
-            total_diversity = 0.0
-            comparisons = 0
-            
-            for i in range(len(self.population)):
-                for j in range(i + 1, len(self.population)):
-                    individual1 = self.population[i]
-                    individual2 = self.population[j]
-                    
-                    diversity = 0.0
-                    for gene_name in self.gene_definitions.keys():
-                        val1 = individual1.get(gene_name, 0)
-                        val2 = individual2.get(gene_name, 0)
-                        gene_def = self.gene_definitions[gene_name]
-                        
-                        # Normalizar diferencia
-                        range_val = gene_def['max'] - gene_def['min']
-                        normalized_diff = abs(val1 - val2) / range_val if range_val > 0 else 0
-                        diversity += normalized_diff
-                    
-                    total_diversity += diversity / len(self.gene_definitions)
-                    comparisons += 1
-            
-            return total_diversity / comparisons if comparisons > 0 else 0.0
+            # Diversidad basada en diferencias normalizadas de parámetros
+            return float(_diversity_kernel(self.population_arr, self._ranges))
             
         except Exception as e:
             logger.error(f"Error calculando diversidad: {e}")
             return 0.0
     
     def save_evolution_state(self, filepath: str):
-        """Guardar estado de evolución"""
+        """Guardar estado de evolución: metadatos en JSON y población en un .npz al lado"""
         try:
-            import json
+            buffer = io.BytesIO()
+            np.savez_compressed(
+                buffer,
+                population=self.population_arr,
+                fitness=np.asarray(self.fitness_scores, dtype=np.float64)
+            )
+            arrays = buffer.getvalue()
+            
+            # Nombre según el contenido: el JSON anterior sigue apuntando a su propio .npz
+            # hasta que se reemplaza, así que un corte entre las dos escrituras no los mezcla
+            base = os.path.splitext(filepath)[0]
+            arrays_path = f"{base}.{hashlib.blake2b(arrays, digest_size=8).hexdigest()}.npz"
+            write_atomic(arrays_path, arrays)
             
             state = {
-                'population': self.population,
-                'fitness_scores': self.fitness_scores,
                 'generation': self.generation,
                 'best_individual': self.best_individual,
                 'best_fitness': self.best_fitness,
                 'evolution_history': self.evolution_history,
-                'gene_definitions': self.gene_definitions
+                'gene_definitions': self.gene_definitions,
+                'arrays_file': os.path.basename(arrays_path)
             }
+            write_atomic(filepath, dumps(state))
             
-            with open(filepath, 'w') as f:
-                json.dump(state, f, indent=2, default=str)
+            # Borrar los .npz de guardados anteriores (ya no los referencia nadie)
+            for old_path in glob.glob(glob.escape(base) + '.*.npz'):
+                if old_path != arrays_path:
+                    os.remove(old_path)
             
             logger.info(f"Estado de evolución guardado en: {filepath}")
             
@@ -398,16 +557,30 @@ class GeneticOptimizer:
     def load_evolution_state(self, filepath: str):
         """Cargar estado de evolución"""
         try:
-            import json
+            with open(filepath, 'rb') as f:
+                state = loads(f.read())
+            
+            if 'population' in state:
+                # Formato anterior: población como lista de diccionarios dentro del JSON
+                population = self._from_individuals(state['population'])
+                fitness_scores = state.get('fitness_scores', [])
+            else:
+                arrays_path = os.path.join(os.path.dirname(filepath), state['arrays_file'])
+                with np.load(arrays_path) as arrays:
+                    population = np.asarray(arrays['population'], dtype=np.float64)
+                    fitness_scores = arrays['fitness'].tolist()
             
-            with open(filepath, 'r') as f:
-                state = json.load(f)
+            # Validar antes de tocar el estado actual: o se carga todo o nada
+            if population.ndim != 2 or population.shape[1] != self._n_genes:
+                raise ValueError(f"población con forma {population.shape}, se esperaban {self._n_genes} genes")
             
-            self.population = state.get('population', [])
-            self.fitness_scores = state.get('fitness_scores', [])
+            self.population_arr = population
+            self.fitness_scores = fitness_scores
             self.generation = state.get('generation', 0)
             self.best_individual = state.get('best_individual')
-            self.best_fitness = state.get('best_fitness', -float('inf'))
+            # orjson guarda -inf como null
+            best_fitness = state.get('best_fitness')
+            self.best_fitness = best_fitness if best_fitness is not None else -float('inf')
             self.evolution_history = state.get('evolution_history', [])
             
             logger.info(f"Estado de evolución cargado desde: {filepath}")
@@ -418,8 +591,9 @@ class GeneticOptimizer:
     def reset_evolution(self):
         """Reiniciar evolución"""
         try:
-            self.population = []
+            self.population_arr = np.empty((0, self._n_genes), dtype=np.float64)
             self.fitness_scores = []
+            self._fitness_cache.clear()
             self.generation = 0
             self.best_individual = None
             self.best_fitness = -float('inf')
@@ -567,7 +567,7 @@ class MT5Connector:
             return {'success': False, 'error': str(e)}
     
     async def get_history_deals(self, days: int = 7) -> List[Dict]:
-        """Obtener historial de operaciones"""
+        """Obtener historial de operaciones, del más antiguo al más reciente"""
         if not self.is_connected():
             return []
         
@@ -615,6 +615,9 @@ class MT5Connector:
                         'comment': getattr(deal, 'comment', '')
                     })
             
+            # Ordenado por tiempo para que se pueda buscar por fecha con bisect
+            # (MT5 ya los suele devolver en orden: la ordenación es lineal en ese caso)
+            deal_list.sort(key=lambda d: d['time'])
             return deal_list
             
         except Exception as e:
@@ -21,6 +21,7 @@ try:
     from .multi_pair_manager import MultiPairManager
     from ..ml.real_time_ml_system import RealTimeMLSystem
     from ..ml.genetic_optimizer import GeneticOptimizer
+    from ..utils.async_cache import invalidate_cache
 except ImportError:
     # Importaciones absolutas (cuando se ejecuta directamente)
     from trading.mt5_connector import MT5Connector
@@ -32,6 +33,7 @@ except ImportError:
     from trading.multi_pair_manager import MultiPairManager
     from ml.real_time_ml_system import RealTimeMLSystem
     from ml.genetic_optimizer import GeneticOptimizer
+    from utils.async_cache import invalidate_cache
 
 logger = logging.getLogger(__name__)
 
@@ -424,6 +426,9 @@ class OptimizedTradingEngine:
     
     async def _record_trade_closure(self, position: Dict, close_reason: str):
         """Registrar cierre de trade para ML"""
+        # Balance, historial y posiciones cambiaron: invalidar las cachés del bot
+        invalidate_cache('balance', 'history', 'positions', 'status')
+        
         try:
             # Buscar el trade en el historial
             for trade in reversed(self.trade_history):
@@ -1144,7 +1149,9 @@ class OptimizedTradingEngine:
     async def close_all_positions(self) -> Dict:
         """Cerrar todas las posiciones"""
         try:
-            return await self.mt5.close_all_positions()
+            result = await self.mt5.close_all_positions()
+            invalidate_cache('balance', 'history', 'positions', 'status')
+            return result
         except Exception as e:
             logger.error(f"Error cerrando posiciones: {e}")
             return {'success': False, 'error': str(e)}
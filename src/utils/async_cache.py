@@ -0,0 +1,79 @@
+"""
+Caché con TTL para corrutinas
+Agrupa llamadas concurrentes con los mismos argumentos en una sola llamada real
+"""
+
+import asyncio
+import functools
+import sys
+import time
+
+# El módulo puede cargarse como src.utils.async_cache y como utils.async_cache (importaciones
+# absolutas de respaldo): la segunda copia reutiliza el registro de la primera
+_twin = sys.modules.get(__name__[4:] if __name__.startswith('src.') else 'src.' + __name__)
+
+# Cachés registradas por etiqueta para poder invalidarlas desde otros módulos
+_caches_by_tag = getattr(_twin, '_caches_by_tag', None)
+if _caches_by_tag is None:
+    _caches_by_tag = {}
+
+# El loop solo guarda referencias débiles a las tareas: mantener vivas las llamadas en curso
+_running = set()
+
+def async_ttl_cache(ttl_seconds: float, tag: str = None):
+    """Decorador de caché TTL para funciones async (functools.lru_cache no sirve con corrutinas)"""
+    def decorator(func):
+        entries = {}  # args -> (expiración, tarea)
+
+        def settle(args, in_flight, task):
+            """Guardar el resultado de la tarea, o descartar la entrada si falló o se canceló"""
+            _running.discard(task)
+            failed = task.cancelled() or task.exception() is not None  # exception() la marca como recuperada
+            # Solo tocar la entrada si nadie invalidó la caché mientras la llamada estaba en curso
+            if entries.get(args) is not in_flight:
+                return
+            if failed:
+                # Los errores no se guardan en caché
+                del entries[args]
+            else:
+                entries[args] = (time.monotonic() + ttl_seconds, task)
+
+        @functools.wraps(func)
+        async def wrapper(*args):
+            try:
+                entry = entries.get(args)
+            except TypeError:
+                # Argumentos no hashables: sin caché
+                return await func(*args)
+
+            if entry is not None and (not entry[1].done() or entry[0] > time.monotonic()):
+                return await asyncio.shield(entry[1])
+
+            # La llamada real corre en su propia tarea: si quien la inició se cancela,
+            # las llamadas concurrentes que la esperan siguen recibiendo el resultado
+            task = asyncio.ensure_future(func(*args))
+            _running.add(task)
+            in_flight = (float('inf'), task)
+            entries[args] = in_flight
+            task.add_done_callback(functools.partial(settle, args, in_flight))
+            return await asyncio.shield(task)
+
+        def invalidate(*args):
+            """Invalidar una entrada concreta, o toda la caché si no se pasan argumentos"""
+            if args:
+                entries.pop(args, None)
+            else:
+                entries.clear()
+
+        wrapper.invalidate = invalidate
+        if tag is not None:
+            _caches_by_tag.setdefault(tag, []).append(wrapper)
+        return wrapper
+
+    return decorator
+
+def invalidate_cache(*tags: str):
+    """Invalidar todas las cachés registradas con las etiquetas indicadas"""
+    for tag in tags:
+        for cached in _caches_by_tag.get(tag, ()):
+            cached.invalidate()
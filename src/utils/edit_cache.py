@@ -0,0 +1,56 @@
+"""
+Ediciones de mensajes sin cambios
+Recuerda lo último renderizado en cada mensaje para no reenviar el mismo contenido
+(Telegram responde 'Message is not modified' y consume límite de peticiones)
+"""
+
+from collections import OrderedDict
+
+class EditCache:
+    """LRU (chat_id, message_id) -> (huella del contenido, texto que quedó en el mensaje)"""
+    
+    __slots__ = ('_entries', '_max_entries')
+    
+    def __init__(self, max_entries: int):
+        self._entries = OrderedDict()
+        self._max_entries = max_entries
+    
+    @staticmethod
+    def _key(message):
+        return (message.chat_id, message.message_id) if message is not None else None
+    
+    @staticmethod
+    def _fingerprint(payload, reply_markup):
+        # Los teclados son constantes de módulo: su id identifica el layout
+        return hash((payload, id(reply_markup)))
+    
+    def unchanged(self, message, payload, reply_markup=None) -> bool:
+        """True si el mensaje sigue mostrando lo que se renderizó a partir de este mismo contenido"""
+        key = self._key(message)
+        cached = self._entries.get(key) if key is not None else None
+        return (
+            cached is not None
+            and cached[0] == self._fingerprint(payload, reply_markup)
+            and cached[1] is not None
+            and cached[1] == message.text
+        )
+    
+    def remember(self, message, payload, reply_markup, result):
+        """Guardar el contenido renderizado y el texto devuelto por Telegram tras editar"""
+        key = self._key(message)
+        if key is None:
+            return
+        self._entries[key] = (self._fingerprint(payload, reply_markup), getattr(result, 'text', None))
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+    
+    async def edit(self, query, text, reply_markup=None, **kwargs) -> bool:
+        """Editar el mensaje del callback solo si el contenido cambió; devuelve si se editó"""
+        message = getattr(query, 'message', None)
+        if self.unchanged(message, text, reply_markup):
+            return False
+        
+        result = await query.edit_message_text(text, reply_markup=reply_markup, **kwargs)
+        self.remember(message, text, reply_markup, result)
+        return True
@@ -0,0 +1,38 @@
+"""
+Persistencia de estado en disco
+Serialización JSON (con orjson si está instalado) y escritura atómica de archivos
+"""
+
+import json
+import os
+
+# orjson es opcional: serializa datetime y tipos de numpy en C
+try:
+    import orjson
+    
+    def dumps(obj) -> bytes:
+        """Serializar a JSON en bytes (los tipos desconocidos se guardan con str)"""
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY, default=str)
+    
+    def loads(data):
+        """Leer JSON de bytes o texto"""
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # Archivos escritos por json (admite NaN e Infinity, que orjson rechaza)
+            return json.loads(data)
+except ImportError:
+    def dumps(obj) -> bytes:
+        """Serializar a JSON en bytes (los tipos desconocidos se guardan con str)"""
+        return json.dumps(obj, default=str).encode()
+    
+    loads = json.loads
+
+def write_atomic(path: str, payload: bytes):
+    """Escribir un archivo completo de una vez: o queda el anterior o el nuevo, nunca a medias"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
@@ -0,0 +1,25 @@
+"""
+Tareas en segundo plano
+Lanza corrutinas sin esperarlas manteniendo una referencia hasta que terminan
+"""
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# El loop solo guarda referencias débiles a las tareas: mantenerlas vivas aquí
+_background_tasks = set()
+
+def _on_task_done(task):
+    """Liberar la tarea y registrar su error, si lo hubo"""
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Error en tarea en segundo plano: %s", task.exception())
+
+def fire_and_forget(coro):
+    """Programar una corrutina sin esperar su resultado"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_on_task_done)
+    return task
@@ -69,6 +69,13 @@ async def start_bot_production():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # uvloop es opcional (no existe en Windows): se instala antes de crear el loop
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     # Detectar si estamos en un entorno de despliegue
     if os.getenv('RAILWAY_ENVIRONMENT') or os.getenv('RENDER') or os.getenv('DYNO'):
         print("🚀 Detectado entorno de producción")
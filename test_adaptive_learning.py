@@ -0,0 +1,191 @@
+"""
+Pruebas de persistencia del aprendizaje adaptativo
+Verifica la compactación del log de trades y la migración del formato antiguo
+"""
+
+import json
+import logging
+import sys
+import os
+import tempfile
+
+# Agregar el directorio src al path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+# Configurar logging simple
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+from ml.adaptive_learning import AdaptiveLearningSystem, _TRADE_MEMORY_SIZE
+
+def _trade(i: int) -> dict:
+    """Trade mínimo con los campos que usa el sistema"""
+    return {
+        'profit': 10.0 if i % 2 else -5.0,
+        'success': bool(i % 2),
+        'confidence': 80,
+        'session': 'london',
+        'reasons': ['rsi'],
+        'signal': 'BUY',
+        'id': i
+    }
+
+def _log_lines(path: str) -> list:
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def test_compaction():
+    """Un log con más de 2000 líneas se reescribe con solo los trades en memoria"""
+    try:
+        total = 2 * _TRADE_MEMORY_SIZE + 100
+        with open("data/learning_data.jsonl", 'w') as f:
+            for i in range(total):
+                f.write(json.dumps(_trade(i)) + "\n")
+            f.write('{"profit": 1')  # Línea cortada por un cierre a mitad de escritura
+
+        system = AdaptiveLearningSystem()
+        system._flush_and_join()
+        assert len(system.trade_memory) == _TRADE_MEMORY_SIZE
+        assert system._trade_log_lines == total
+
+        system.save_learning_data()
+        lines = _log_lines("data/learning_data.jsonl")
+        assert len(lines) == _TRADE_MEMORY_SIZE, len(lines)
+        assert [t['id'] for t in lines] == list(range(total - _TRADE_MEMORY_SIZE, total))
+        assert system._trade_log_lines == _TRADE_MEMORY_SIZE
+        assert os.path.exists("data/adaptive_model.json")
+
+        # Con el log ya compacto no se vuelve a reescribir
+        system.save_learning_data()
+        assert len(_log_lines("data/learning_data.jsonl")) == _TRADE_MEMORY_SIZE
+
+        logger.info("OK: Log compactado")
+        return True
+
+    except Exception as e:
+        logger.error(f"ERROR en compactación: {e!r}")
+        return False
+
+def test_legacy_migration():
+    """learning_data.json antiguo pasa al log JSONL y sus pesos y parámetros se conservan"""
+    try:
+        legacy = {
+            'trades': [_trade(i) for i in range(5)],
+            'weights': {'rsi': 1.7, 'macd': 0.4},
+            'params': {'min_confidence': 81.5, 'risk_multiplier': 0.9, 'sl_multiplier': 1.0,
+                       'tp_multiplier': 1.0, 'session_preferences': {'london': 1.3}},
+            'stats': {'total_trades_learned': 5, 'accuracy_improvement': 0.0,
+                      'last_optimization': None, 'learning_cycles': 0}
+        }
+        with open("data/learning_data.json", 'w') as f:
+            json.dump(legacy, f)
+
+        system = AdaptiveLearningSystem()
+        system._flush_and_join()
+        assert [t['id'] for t in system.trade_memory] == list(range(5))
+        assert [t['id'] for t in _log_lines("data/learning_data.jsonl")] == list(range(5))
+        assert system.indicator_weights['rsi'] == 1.7
+        assert system.indicator_weights['macd'] == 0.4
+        assert system.adaptive_params['min_confidence'] == 81.5
+        assert system.learning_stats['total_trades_learned'] == 5
+
+        # Tras el primer snapshot se carga del modelo nuevo, sin duplicar trades
+        system.save_learning_data()
+        reloaded = AdaptiveLearningSystem()
+        reloaded._flush_and_join()
+        assert len(reloaded.trade_memory) == 5
+        assert reloaded.indicator_weights['rsi'] == 1.7
+
+        logger.info("OK: Formato antiguo migrado")
+        return True
+
+    except Exception as e:
+        logger.error(f"ERROR en migración: {e!r}")
+        return False
+
+def test_record_trade_appends():
+    """record_trade añade el trade al log al vaciar el hilo de escritura"""
+    try:
+        system = AdaptiveLearningSystem()
+        system.record_trade({'signal': 'SELL', 'profit': 12.5, 'confidence': 85, 'reasons': ['macd']})
+        system._flush_and_join()
+
+        lines = _log_lines("data/learning_data.jsonl")
+        assert len(lines) == 1, len(lines)
+        assert lines[0]['signal'] == 'SELL' and lines[0]['success'] is True
+
+        logger.info("OK: Trade añadido al log")
+        return True
+
+    except Exception as e:
+        logger.error(f"ERROR registrando trade: {e!r}")
+        return False
+
+def test_read_only_params():
+    """Los parámetros devueltos no permiten modificar el estado, tampoco en los dicts anidados"""
+    try:
+        system = AdaptiveLearningSystem()
+        system._flush_and_join()
+        params = system.get_adaptive_params()
+
+        try:
+            params['min_confidence'] = 0
+            raise AssertionError("la vista aceptó modificar un parámetro")
+        except TypeError:
+            pass
+        try:
+            params['session_preferences']['london'] = 99
+            raise AssertionError("la vista aceptó modificar un dict anidado")
+        except TypeError:
+            pass
+
+        # La vista refleja los cambios del aprendizaje sin volver a pedirla
+        system.adaptive_params['session_preferences']['london'] = 1.4
+        assert params['session_preferences']['london'] == 1.4
+
+        # La copia es independiente en todos los niveles
+        params_copy = system.get_adaptive_params_copy()
+        params_copy['session_preferences']['london'] = 99
+        assert system.adaptive_params['session_preferences']['london'] == 1.4
+
+        logger.info("OK: Parámetros de solo lectura")
+        return True
+
+    except Exception as e:
+        logger.error(f"ERROR en parámetros de solo lectura: {e!r}")
+        return False
+
+def run_tests():
+    """Ejecutar cada prueba en un directorio de datos vacío"""
+    logger.info("=== PRUEBAS DE APRENDIZAJE ADAPTATIVO ===")
+
+    tests = {
+        'Compactación del log': test_compaction,
+        'Migración del formato antiguo': test_legacy_migration,
+        'Registro de trades': test_record_trade_appends,
+        'Parámetros de solo lectura': test_read_only_params
+    }
+
+    results = {}
+    cwd = os.getcwd()
+    for name, test in tests.items():
+        # El sistema usa rutas relativas a data/
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                os.makedirs("data")
+                results[name] = test()
+            finally:
+                os.chdir(cwd)
+
+    # Resumen
+    logger.info("=== RESUMEN DE PRUEBAS ===")
+    for name, ok in results.items():
+        logger.info(f"{name}: {'OK' if ok else 'FALLO'}")
+
+    return all(results.values())
+
+if __name__ == "__main__":
+    success = run_tests()
+    print("\nTODAS LAS PRUEBAS PASARON" if success else "\nREVISAR ERRORES")
+    sys.exit(0 if success else 1)
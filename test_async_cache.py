@@ -0,0 +1,157 @@
+"""
+Pruebas de la caché TTL para corrutinas
+Verifica la agrupación de llamadas en curso, la cancelación y la invalidación por etiqueta
+"""
+
+import asyncio
+import logging
+import sys
+import os
+
+# Agregar la raíz (src.utils...) y el directorio src (utils...) al path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+# Configurar logging simple
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+from src.utils.async_cache import async_ttl_cache, invalidate_cache
+
+def _counting_fetch(delay: float = 0.05, fail: bool = False):
+    """Función async cacheada que cuenta cuántas veces se ejecuta de verdad"""
+    calls = []
+
+    @async_ttl_cache(60.0)
+    async def fetch(key):
+        calls.append(key)
+        await asyncio.sleep(delay)
+        if fail:
+            raise ValueError("fallo simulado")
+        return f"valor-{key}"
+
+    return fetch, calls
+
+async def test_in_flight_dedup():
+    """Llamadas concurrentes con los mismos argumentos hacen una sola llamada real"""
+    try:
+        fetch, calls = _counting_fetch()
+        results = await asyncio.gather(*(fetch('EURUSD') for _ in range(5)))
+        assert results == ['valor-EURUSD'] * 5, results
+        assert calls == ['EURUSD'], calls
+
+        # Dentro del TTL se sirve desde la caché
+        assert await fetch('EURUSD') == 'valor-EURUSD'
+        assert calls == ['EURUSD'], calls
+
+        logger.info("OK: Llamadas en curso agrupadas")
+        return True
+
+    except Exception as e:
+        logger.error(f"ERROR en agrupación de llamadas: {e!r}")
+        return False
+
+async def test_owner_cancelled():
+    """Cancelar a quien inició la llamada no cancela a los demás que la esperan"""
+    try:
+        fetch, calls = _counting_fetch()
+        owner = asyncio.create_task(fetch('GBPUSD'))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(fetch('GBPUSD'))
+        await asyncio.sleep(0)
+
+        owner.cancel()
+        assert await waiter == 'valor-GBPUSD'
+        try:
+            await owner
+            raise AssertionError("la tarea cancelada devolvió un resultado")
+        except asyncio.CancelledError:
+            pass
+
+        # El resultado quedó en caché aunque su dueño se cancelara
+        assert await fetch('GBPUSD') == 'valor-GBPUSD'
+        assert calls == ['GBPUSD'], calls
+
+        logger.info("OK: La cancelación del dueño no afecta a los demás")
+        return True
+
+    except (Exception, asyncio.CancelledError) as e:
+        logger.error(f"ERROR en cancelación del dueño: {e!r}")
+        return False
+
+async def test_errors_not_cached():
+    """Los errores llegan a todos los que esperan y no se guardan en caché"""
+    try:
+        fetch, calls = _counting_fetch(fail=True)
+        results = await asyncio.gather(fetch('USDJPY'), fetch('USDJPY'), return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results), results
+        assert len(calls) == 1, calls
+
+        try:
+            await fetch('USDJPY')
+            raise AssertionError("el error quedó en caché como resultado")
+        except ValueError:
+            pass
+        assert len(calls) == 2, calls
+
+        logger.info("OK: Errores no cacheados")
+        return True
+
+    except Exception as e:
+        logger.error(f"ERROR en manejo de errores: {e!r}")
+        return False
+
+async def test_invalidate_across_import_paths():
+    """invalidate_cache importado como utils.async_cache limpia cachés de src.utils.async_cache"""
+    try:
+        import src.utils.async_cache as relative_module
+        import utils.async_cache as absolute_module
+        assert relative_module is not absolute_module
+        assert relative_module._caches_by_tag is absolute_module._caches_by_tag
+
+        calls = []
+
+        @relative_module.async_ttl_cache(60.0, tag='test_balance')
+        async def fetch_balance():
+            calls.append(1)
+            return len(calls)
+
+        assert await fetch_balance() == 1
+        assert await fetch_balance() == 1
+
+        # Como hace optimized_engine con las importaciones absolutas de respaldo
+        absolute_module.invalidate_cache('test_balance')
+        assert await fetch_balance() == 2
+
+        invalidate_cache('test_balance')
+        assert await fetch_balance() == 3
+
+        logger.info("OK: Invalidación compartida entre rutas de importación")
+        return True
+
+    except Exception as e:
+        logger.error(f"ERROR en invalidación entre rutas: {e!r}")
+        return False
+
+async def run_tests():
+    """Ejecutar todas las pruebas"""
+    logger.info("=== PRUEBAS DE CACHÉ ASYNC ===")
+
+    results = {
+        'Agrupación en curso': await test_in_flight_dedup(),
+        'Cancelación del dueño': await test_owner_cancelled(),
+        'Errores no cacheados': await test_errors_not_cached(),
+        'Invalidación entre rutas': await test_invalidate_across_import_paths()
+    }
+
+    # Resumen
+    logger.info("=== RESUMEN DE PRUEBAS ===")
+    for name, ok in results.items():
+        logger.info(f"{name}: {'OK' if ok else 'FALLO'}")
+
+    return all(results.values())
+
+if __name__ == "__main__":
+    success = asyncio.run(run_tests())
+    print("\nTODAS LAS PRUEBAS PASARON" if success else "\nREVISAR ERRORES")
+    sys.exit(0 if success else 1)